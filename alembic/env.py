@@ -8,6 +8,7 @@
 3. 支持 async SQLAlchemy (SQLite/MySQL)
 """
 import os
+import re
 import sys
 from logging.config import fileConfig
 from pathlib import Path
@@ -20,6 +21,11 @@ sys.path.insert(0, str(project_root))
 
 # ============== 加载 .env 文件 ==============
 # 优先从当前目录的 .env 读取，然后是项目根目录的 .env
+
+# KEY=VALUE 行（# 开头的注释行不匹配键名规则，自然被跳过）
+_ENV_LINE_RE = re.compile(r"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t\r]*$", re.M)
+
+
 def load_dotenv_file():
     """加载 .env 文件到环境变量"""
     # 尝试的 .env 文件路径
@@ -31,16 +37,10 @@ def load_dotenv_file():
     for env_path in env_paths:
         if env_path.exists():
             print(f"[Alembic] 加载 .env 文件: {env_path}")
-            with open(env_path, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        key, _, value = line.partition("=")
-                        key = key.strip()
-                        value = value.strip()
-                        # 不覆盖已有的环境变量
-                        if key not in os.environ:
-                            os.environ[key] = value
+            data = env_path.read_text(encoding="utf-8")
+            for key, value in _ENV_LINE_RE.findall(data):
+                # 不覆盖已有的环境变量
+                os.environ.setdefault(key, value)
             return True
     return False
 
@@ -60,22 +60,23 @@ if config.config_file_name is not None:
 
 # ============== 数据库 URL 配置 ==============
 
+# async 驱动 -> sync 驱动 (Alembic 需要同步引擎)，未知类型保持原样
+_SYNC_SCHEME_MAP = {
+    "sqlite+aiosqlite": "sqlite",
+    "mysql+aiomysql": "mysql+pymysql",
+}
+
 # 从环境变量读取 DATABASE_URL (优先级高于 alembic.ini)
 database_url = os.getenv("DATABASE_URL")
 if database_url:
-    # 转换 async URL 为 sync URL (Alembic 需要同步引擎)
     # sqlite+aiosqlite:///... -> sqlite:///
     # mysql+aiomysql:///... -> mysql+pymysql:///
-    if database_url.startswith("sqlite+aiosqlite"):
-        sync_url = database_url.replace("sqlite+aiosqlite", "sqlite")
-    elif database_url.startswith("mysql+aiomysql"):
-        sync_url = database_url.replace("mysql+aiomysql", "mysql+pymysql")
-    else:
-        # 未知类型，保持原样
-        sync_url = database_url
-
-    # 转义 % 符号，避免 configparser 解析问题
-    escaped_url = sync_url.replace("%", "%%")
+    scheme, sep, rest = database_url.partition("://")
+    sync_scheme = _SYNC_SCHEME_MAP.get(scheme, scheme)
+    sync_url = f"{sync_scheme}{sep}{rest}"
+
+    # 转义 % 符号，避免 configparser 解析问题（scheme 中不含 %，只需处理其余部分）
+    escaped_url = f"{sync_scheme}{sep}{rest.replace('%', '%%')}"
     config.set_main_option("sqlalchemy.url", escaped_url)
     print(f"[Alembic] 使用环境变量 DATABASE_URL: {sync_url[:50]}...")
 
@@ -125,6 +126,9 @@ def run_migrations_online() -> None:
     if url.startswith("sqlite"):
         configuration["sqlalchemy.connect_args"] = {"check_same_thread": False}
 
+    # 整个迁移过程只使用下面 connect() 取得的这一条连接（所有 DDL/DML 复用它），
+    # 因此 NullPool 不会带来额外的建连开销；换成 QueuePool 也不会减少握手次数，
+    # 反而会在进程退出前保留一个空闲连接
     connectable = engine_from_config(
         configuration,
         prefix="sqlalchemy.",
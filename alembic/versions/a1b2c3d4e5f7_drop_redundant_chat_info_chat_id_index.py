@@ -0,0 +1,29 @@
+"""drop_redundant_chat_info_chat_id_index
+
+Revision ID: a1b2c3d4e5f7
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-16
+
+chat_info.chat_id 上同时存在非唯一索引 idx_chat_info_chat_id 和唯一索引
+ix_chat_info_chat_id。唯一索引已能满足等值查询，非唯一索引只会增加写入开销，
+在此删除。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "a1b2c3d4e5f7"
+down_revision: Union[str, Sequence[str], None] = "e5f6a7b8c9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("chat_info", schema=None) as batch_op:
+        batch_op.drop_index("idx_chat_info_chat_id")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("chat_info", schema=None) as batch_op:
+        batch_op.create_index("idx_chat_info_chat_id", ["chat_id"], unique=False)
@@ -0,0 +1,34 @@
+"""chat_info_type_last_seen_compound_index
+
+Revision ID: b2c3d4e5f6a8
+Revises: a1b2c3d4e5f7
+Create Date: 2026-10-16
+
+ChatInfoRepository.get_all 按 chat_type 过滤后按 last_seen_at 倒序取前 N 条。
+用 (chat_type, last_seen_at) 复合索引替换 chat_type 单列索引，可直接走索引
+范围扫描而无需额外排序；复合索引的前缀仍可服务仅按 chat_type 的查询。
+last_seen_at 单列索引保留，用于不带类型过滤的排序。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "b2c3d4e5f6a8"
+down_revision: Union[str, Sequence[str], None] = "a1b2c3d4e5f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("chat_info", schema=None) as batch_op:
+        batch_op.drop_index("idx_chat_info_chat_type")
+        batch_op.create_index(
+            "idx_chat_info_type_last_seen", ["chat_type", "last_seen_at"], unique=False
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("chat_info", schema=None) as batch_op:
+        batch_op.drop_index("idx_chat_info_type_last_seen")
+        batch_op.create_index("idx_chat_info_chat_type", ["chat_type"], unique=False)
@@ -12,18 +12,24 @@ Forward Service 主应用
     - 默认使用 SQLite 数据库 (data/forward_service.db)
     - 支持 MySQL (通过 DATABASE_URL 环境变量配置)
 """
+import asyncio
 import logging
+import sys
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
 import os
 
+import orjson
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse, Response as FastAPIResponse
 
 from fastapi import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+from tunely import StreamStartMessage, StreamChunkMessage, StreamEndMessage
 
 from .config import config
 from .database import database_lifespan, get_db_manager, get_database_url
@@ -59,8 +65,6 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    import asyncio
-    
     async with database_lifespan():
         # 初始化配置
         await config.initialize()
@@ -134,23 +138,27 @@ async def lifespan(app: FastAPI):
         qqbot_bots = []
         weixin_bots = []
         for bot_key, bot in config.bots.items():
-            bot_platform = bot._bot.platform if bot._bot else "unknown"
+            bot_platform = bot.platform or "unknown"
             logger.info(f"  - {bot.name} (key={bot_key[:10]}..., platform={bot_platform}, enabled={bot.enabled})")
             if bot_platform == "discord" and bot.enabled:
                 discord_bots.append(bot_key)
             elif bot_platform == "qqbot" and bot.enabled:
                 qqbot_bots.append(bot_key)
             elif bot_platform == "weixin" and bot.enabled:
-                platform_cfg = bot._bot.get_platform_config() if bot._bot else {}
+                platform_cfg = bot.get_platform_config()
                 if platform_cfg.get("bot_token") and platform_cfg.get("login_status") == "logged_in":
                     weixin_bots.append(bot_key)
         
-        # 启动 Discord Bot（后台任务）
-        discord_tasks = []
-        for bot_key in discord_bots:
-            task = asyncio.create_task(discord_router.start_discord_bot(bot_key))
-            discord_tasks.append(task)
-            logger.info(f"  🚀 启动 Discord Bot 任务: {bot_key[:10]}...")
+        # 启动 Discord Bot（后台任务，各 Bot 并发连接）
+        discord_tasks = [
+            asyncio.create_task(discord_router.start_discord_bot(bot_key))
+            for bot_key in discord_bots
+        ]
+        if discord_bots:
+            logger.info(
+                f"  🚀 启动 Discord Bot 任务 ({len(discord_bots)} 个): "
+                + ", ".join(f"{bot_key[:10]}..." for bot_key in discord_bots)
+            )
 
         # 启动 QQ Bot（后台任务）
         from .routes import qqbot as qqbot_router
@@ -175,10 +183,16 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"  异步任务优雅关闭异常（继续退出）: {e}")
 
-        # 关闭 Discord Bot
-        for bot_key, client in discord_router.discord_bots.items():
-            logger.info(f"  ⏹️  关闭 Discord Bot: {bot_key[:10]}...")
-            await client.close()
+        # 关闭 Discord Bot（并发关闭，单个失败不影响其它）
+        if discord_router.discord_bots:
+            logger.info(f"  ⏹️  关闭 Discord Bot ({len(discord_router.discord_bots)} 个)")
+            results = await asyncio.gather(
+                *(client.close() for client in discord_router.discord_bots.values()),
+                return_exceptions=True,
+            )
+            for bot_key, result in zip(discord_router.discord_bots, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"  关闭 Discord Bot 异常: {bot_key[:10]}... - {result}")
         
         # 关闭 QQ Bot
         for bot_key, client in qqbot_router.qqbot_clients.items():
@@ -200,6 +214,10 @@ async def lifespan(app: FastAPI):
             if not task.done():
                 task.cancel()
 
+        # 关闭复用的 Lark/Slack/Telegram HTTP 客户端
+        from .clients import close_all_clients
+        await close_all_clients()
+
         # 关闭隧道服务器
         await tunnel_server.close()
         logger.info("Forward Service 关闭")
@@ -216,105 +234,121 @@ async def _start_weixin_bot(bot_key: str) -> None:
         logger.error(f"  微信 Bot 启动异常: {bot_key[:10]}... - {e}", exc_info=True)
 
 
-# 创建 FastAPI 应用
-app = FastAPI(
-    title="Forward Service",
-    description="消息转发服务 - 接收企微回调，转发到 Agent",
-    version="3.0.0",
-    lifespan=lifespan
-)
-
-# CORS 中间件
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# 注册路由
-app.include_router(admin_router)
-app.include_router(bots_router)
-app.include_router(bots_api_router)              # 用户级接口，JWT 鉴权
-app.include_router(async_tasks_api_router)       # 异步任务管理，X-Admin-Key
-app.include_router(outbound_context_router)      # 出站消息上下文 API，JWT 鉴权
-app.include_router(im_send_router)               # 出站消息发送 API，JWT 鉴权
-app.include_router(callback_router)              # 旧的 /callback（向后兼容）
-app.include_router(unified_callback_router)      # 新的 /callback/{platform}（多平台统一入口）
-app.include_router(intelligent_router)           # 智能机器人路由
-app.include_router(slack_router)                 # Slack 集成路由
-app.include_router(telegram_router)              # Telegram 集成路由
-app.include_router(lark_router)                  # 飞书集成路由
-app.include_router(tunnel_server.router)         # 隧道服务路由
-app.include_router(tunnel_proxy_router)          # 隧道代理路由 (/t/{domain}/...)
-app.include_router(qqbot_admin_router)           # QQ Bot 管理路由 (/admin/qqbot/...)
-app.include_router(weixin_admin_router)          # 微信管理路由 (/admin/weixin/...)
-
-# MCP HTTP 端点
-# 配置 JWT_SECRET_KEY 时启用 JWT 鉴权（与 as-enterprise 共享同一个密钥）
-# 未配置时跳过鉴权（内网/开发模式）
-app.mount("/mcp", get_mcp_http_app(jwt_secret=os.getenv("JWT_SECRET_KEY")))
-
-# 静态文件目录
-STATIC_DIR = Path(__file__).parent / "static"
+# ============== 子域名转发 ==============
 
 # 隧道域名配置（用于子域名路由）
 _tunnel_config = load_tunnel_config()
 TUNNEL_BASE_DOMAIN = _tunnel_config.get("domain", "tunnel")
+_BASE_SUFFIX_BYTES = b"." + TUNNEL_BASE_DOMAIN.encode("latin-1")
+_BASE_SUFFIX_LEN = len(_BASE_SUFFIX_BYTES)
+
+# 不应通过隧道转发的请求头（ASGI 原始头名均为小写 bytes）
+_EXCLUDED_REQUEST_HEADERS = frozenset({
+    b"host", b"content-length", b"connection", b"upgrade",
+    b"x-real-ip", b"x-forwarded-for", b"x-forwarded-proto",
+    b"transfer-encoding", b"te", b"trailer", b"keep-alive",
+    b"proxy-connection", b"proxy-authorization",
+})
+
+# 预编码的 SSE 帧（StreamingResponse 对 bytes 不再重复编码）
+_SSE_START = b"event: start\ndata: {}\n\n"
+_SSE_DONE = b"event: done\ndata: {}\n\n"
+_SSE_ERROR_PREFIX = b"event: error\ndata: "
+
+# SSE 帧合并写出的阈值：缓冲超过该字节数，或等待下一帧超过该秒数即写出
+_SSE_FLUSH_BYTES = 8 * 1024
+_SSE_FLUSH_DELAY = 0.002
+
+# 隧道响应中不应回传给客户端的头（逐跳头 + 由 CORS 中间件统一补充的跨域头）
+_HOP_BY_HOP_RESPONSE_HEADERS = frozenset({
+    "connection", "keep-alive", "transfer-encoding", "te", "trailer",
+    "upgrade", "proxy-connection", "content-length", "content-encoding",
+    "access-control-allow-origin", "access-control-allow-methods",
+    "access-control-allow-headers", "access-control-allow-credentials",
+    "access-control-expose-headers", "access-control-max-age",
+})
+
+
+def _extract_subdomain(host: bytes) -> str | None:
+    """从 Host 头（ASGI 原始 bytes）中提取子域名"""
+    host = host.partition(b":")[0]
+    if host.endswith(_BASE_SUFFIX_BYTES):
+        subdomain = host[:-_BASE_SUFFIX_LEN]
+        if subdomain and b"." not in subdomain:
+            return subdomain.decode("latin-1")
+    return None
 
 
-def _extract_subdomain(host: str) -> str | None:
-    """从 Host 头中提取子域名"""
-    host = host.split(":")[0]
-    if host == TUNNEL_BASE_DOMAIN:
-        return None
-    suffix = f".{TUNNEL_BASE_DOMAIN}"
-    if host.endswith(suffix):
-        subdomain = host[:-len(suffix)]
-        if "." not in subdomain:
-            return subdomain
-    return None
+async def _coalesce_sse_frames(
+    frames: AsyncIterator[bytes],
+    max_bytes: int = _SSE_FLUSH_BYTES,
+    max_delay: float = _SSE_FLUSH_DELAY,
+) -> AsyncIterator[bytes]:
+    """
+    合并短时间内连续到达的 SSE 帧，一次写出
+
+    缓冲为空时一直等待下一帧（不增加首帧延迟）；缓冲非空时最多再等待
+    max_delay 秒，超时或缓冲达到 max_bytes 即写出。等待使用独立 future，
+    超时不会取消上游生成器。
+    """
+    buffer = bytearray()
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(frames))
+            if buffer:
+                done, _ = await asyncio.wait({pending}, timeout=max_delay)
+                if not done:
+                    yield bytes(buffer)
+                    buffer.clear()
+                    continue
+            try:
+                frame = await pending
+            except StopAsyncIteration:
+                break
+            pending = None
+            buffer += frame
+            if len(buffer) >= max_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
 
 
 async def _forward_subdomain_request(request: Request, subdomain: str, path: str):
     """将子域名请求转发到隧道（复用 tunnel_proxy 的逻辑）"""
-    import json
-    from fastapi.responses import StreamingResponse, Response as FastAPIResponse
-    
     if not tunnel_server.manager.is_connected(subdomain):
-        return FastAPIResponse(
-            content=json.dumps({"error": f"Tunnel not connected: {subdomain}"}),
+        return ORJSONResponse(
+            {"error": f"Tunnel not connected: {subdomain}"},
             status_code=503,
-            media_type="application/json",
         )
     
     method = request.method
-    headers = dict(request.headers)
-    # Remove hop-by-hop and proxy headers that should not be forwarded through tunnel
-    for h in ["host", "content-length", "connection", "upgrade",
-              "x-real-ip", "x-forwarded-for", "x-forwarded-proto",
-              "transfer-encoding", "te", "trailer", "keep-alive",
-              "proxy-connection", "proxy-authorization"]:
-        headers.pop(h, None)
+    # Drop hop-by-hop and proxy headers in the same pass that builds the dict
+    headers = {
+        k.decode("latin-1"): v.decode("latin-1")
+        for k, v in request.headers.raw
+        if k not in _EXCLUDED_REQUEST_HEADERS
+    }
+    accept_header = request.headers.get("accept", "")
     
+    # 请求体按原文转发，不在此处做 JSON 解析：隧道客户端收到字符串后以原始
+    # content 发给上游，Content-Type 头随请求一并转发，上游看到的字节与原请求一致
     body = None
     if method in ("POST", "PUT", "PATCH"):
         body_bytes = await request.body()
         if body_bytes:
-            try:
-                body = json.loads(body_bytes)
-            except json.JSONDecodeError:
-                body = body_bytes.decode("utf-8", errors="replace")
+            body = body_bytes.decode("utf-8", errors="replace")
     
-    accept_header = headers.get("accept", "")
     is_sse = "text/event-stream" in accept_header
     
     logger.info(f"[SubdomainProxy] {method} {subdomain}{path} (SSE={is_sse})")
     
     if is_sse:
-        from tunely import StreamStartMessage, StreamChunkMessage, StreamEndMessage
-        
         async def stream_gen():
             try:
                 async for msg in tunnel_server.forward_stream(
@@ -322,21 +356,24 @@ async def _forward_subdomain_request(request: Request, subdomain: str, path: str
                     headers=headers, body=body, timeout=300.0,
                 ):
                     if isinstance(msg, StreamStartMessage):
-                        yield f"event: start\ndata: {{}}\n\n"
+                        yield _SSE_START
                     elif isinstance(msg, StreamChunkMessage):
-                        yield f"data: {msg.data}\n\n"
+                        data = msg.data
+                        if isinstance(data, str):
+                            data = data.encode("utf-8")
+                        yield b"data: " + data + b"\n\n"
                     elif isinstance(msg, StreamEndMessage):
                         if msg.error:
-                            yield f"event: error\ndata: {msg.error}\n\n"
+                            yield _SSE_ERROR_PREFIX + str(msg.error).encode("utf-8") + b"\n\n"
                         else:
-                            yield f"event: done\ndata: {{}}\n\n"
+                            yield _SSE_DONE
                         break
             except Exception as e:
                 logger.error(f"[SubdomainProxy] Stream error: {e}", exc_info=True)
-                yield f"event: error\ndata: {str(e)}\n\n"
+                yield _SSE_ERROR_PREFIX + str(e).encode("utf-8") + b"\n\n"
         
         return StreamingResponse(
-            stream_gen(),
+            _coalesce_sse_frames(stream_gen()),
             media_type="text/event-stream",
             headers={"Cache-Control": "no-cache", "Connection": "keep-alive", "X-Accel-Buffering": "no"},
         )
@@ -349,24 +386,20 @@ async def _forward_subdomain_request(request: Request, subdomain: str, path: str
             logger.info(f"[SubdomainProxy] Forward response: status={response.status}, body_type={type(response.body).__name__}, body_len={len(response.body) if response.body else 0}, error={response.error}")
             
             if response.error:
-                return FastAPIResponse(
-                    content=json.dumps({"error": response.error}),
+                return ORJSONResponse(
+                    {"error": response.error},
                     status_code=response.status or 502,
-                    media_type="application/json",
                 )
             
-            resp_headers = dict(response.headers) if response.headers else {}
-            for h in ["connection", "keep-alive", "transfer-encoding", "te", "trailer",
-                       "upgrade", "proxy-connection", "content-length", "content-encoding",
-                       "access-control-allow-origin", "access-control-allow-methods",
-                       "access-control-allow-headers", "access-control-allow-credentials",
-                       "access-control-expose-headers", "access-control-max-age"]:
-                resp_headers.pop(h, None)
+            resp_headers = {
+                k: v for k, v in (response.headers or {}).items()
+                if k.lower() not in _HOP_BY_HOP_RESPONSE_HEADERS
+            }
             content = response.body
             if content is None:
                 content = b""
             elif not isinstance(content, (str, bytes)):
-                content = json.dumps(content)
+                content = orjson.dumps(content)
             media_type = resp_headers.get("content-type", "application/octet-stream")
             return FastAPIResponse(
                 content=content, status_code=response.status,
@@ -375,22 +408,100 @@ async def _forward_subdomain_request(request: Request, subdomain: str, path: str
             )
         except Exception as e:
             logger.error(f"[SubdomainProxy] Forward error: {e}", exc_info=True)
-            return FastAPIResponse(
-                content=json.dumps({"error": f"Forward failed: {str(e)}"}),
+            return ORJSONResponse(
+                {"error": f"Forward failed: {str(e)}"},
                 status_code=502,
-                media_type="application/json",
             )
 
 
+class SubdomainDispatchMiddleware:
+    """
+    子域名转发中间件（纯 ASGI）
+
+    在路由匹配之前检查 Host 头：命中隧道子域名的 HTTP 请求直接转发到隧道，
+    其余请求原样交给下游应用，不构造 Request 对象。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        host = b""
+        for name, value in scope["headers"]:
+            if name == b"host":
+                host = value
+                break
+        subdomain = _extract_subdomain(host)
+        if not subdomain:
+            await self.app(scope, receive, send)
+            return
+
+        # 直接拼接原始查询串，避免经 QueryParams 解析后再重新编码
+        full_path = scope["path"]
+        raw_qs = scope.get("query_string", b"")
+        if raw_qs:
+            full_path += "?" + raw_qs.decode("latin-1")
+        request = Request(scope, receive)
+        response = await _forward_subdomain_request(request, subdomain, full_path)
+        await response(scope, receive, send)
+
+
+# 创建 FastAPI 应用
+app = FastAPI(
+    title="Forward Service",
+    description="消息转发服务 - 接收企微回调，转发到 Agent",
+    version="3.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# 子域名转发中间件（需先于 CORS 注册，使 CORS 位于外层，为转发响应补充跨域头）
+app.add_middleware(SubdomainDispatchMiddleware)
+
+# CORS 中间件
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# 注册路由
+app.include_router(admin_router)
+app.include_router(bots_router)
+app.include_router(bots_api_router)              # 用户级接口，JWT 鉴权
+app.include_router(async_tasks_api_router)       # 异步任务管理，X-Admin-Key
+app.include_router(outbound_context_router)      # 出站消息上下文 API，JWT 鉴权
+app.include_router(im_send_router)               # 出站消息发送 API，JWT 鉴权
+app.include_router(callback_router)              # 旧的 /callback（向后兼容）
+app.include_router(unified_callback_router)      # 新的 /callback/{platform}（多平台统一入口）
+app.include_router(intelligent_router)           # 智能机器人路由
+app.include_router(slack_router)                 # Slack 集成路由
+app.include_router(telegram_router)              # Telegram 集成路由
+app.include_router(lark_router)                  # 飞书集成路由
+app.include_router(tunnel_server.router)         # 隧道服务路由
+app.include_router(tunnel_proxy_router)          # 隧道代理路由 (/t/{domain}/...)
+app.include_router(qqbot_admin_router)           # QQ Bot 管理路由 (/admin/qqbot/...)
+app.include_router(weixin_admin_router)          # 微信管理路由 (/admin/weixin/...)
+
+# MCP HTTP 端点
+# 配置 JWT_SECRET_KEY 时启用 JWT 鉴权（与 as-enterprise 共享同一个密钥）
+# 未配置时跳过鉴权（内网/开发模式）
+app.mount("/mcp", get_mcp_http_app(jwt_secret=os.getenv("JWT_SECRET_KEY")))
+
+# 静态文件目录
+STATIC_DIR = Path(__file__).parent / "static"
+
 # ============== 基础路由 ==============
 
 @app.api_route("/", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"])
 async def root(request: Request):
-    """根路径 - 支持子域名转发"""
-    host = request.headers.get("host", "")
-    subdomain = _extract_subdomain(host)
-    if subdomain:
-        return await _forward_subdomain_request(request, subdomain, "/")
+    """根路径"""
     return {
         "service": "Forward Service",
         "version": "3.0.0",
@@ -408,42 +519,41 @@ async def health() -> dict:
     }
 
 
-# ============== 子域名模式路由（通用 catch-all） ==============
+# ============== 入口点 ==============
 
-@app.api_route(
-    "/{path:path}",
-    methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"],
-)
-async def catch_all(request: Request, path: str):
-    """通用路由 - 子域名转发"""
-    import json
-    from fastapi.responses import Response as FastAPIResponse
-    
-    host = request.headers.get("host", "")
-    subdomain = _extract_subdomain(host)
-    
-    if subdomain:
-        full_path = f"/{path}"
-        if request.query_params:
-            full_path += f"?{request.query_params}"
-        return await _forward_subdomain_request(request, subdomain, full_path)
-    
-    return FastAPIResponse(
-        content=json.dumps({"detail": "Not Found"}),
-        status_code=404,
-        media_type="application/json",
-    )
+def _select_loop_and_http() -> tuple[str, str]:
+    """
+    选择 uvicorn 的事件循环与 HTTP 协议实现
 
+    Linux 上优先使用 uvloop + httptools（减少代理/SSE 路径的系统调用开销），
+    依赖未安装或非 Linux 平台时回退到 asyncio + h11。
+    """
+    if sys.platform != "linux":
+        return "asyncio", "h11"
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    return loop, http
 
-# ============== 入口点 ==============
 
 def main():
     """主函数"""
     import uvicorn
+    loop, http = _select_loop_and_http()
+    logger.info(f"事件循环: {loop}, HTTP 协议实现: {http}")
     uvicorn.run(
         "forward_service.app:app",
         host="0.0.0.0",
         port=config.port,
+        loop=loop,
+        http=http,
         reload=False
     )
 
@@ -262,7 +262,7 @@ class LarkAdapter(ChannelAdapter):
         根据 bot_key 获取 LarkClient 实例
 
         从 Bot 配置中读取 app_id、app_secret、encrypt_key，
-        创建并返回 LarkClient 实例。
+        返回复用的 LarkClient 实例。
 
         Returns:
             LarkClient 实例，如果配置不存在返回 None
@@ -272,14 +272,14 @@ class LarkAdapter(ChannelAdapter):
 
         try:
             from ..config import config
-            from ..clients.lark import LarkClient
+            from ..clients.lark import get_lark_client
 
             bot_config = config.get_bot(bot_key)
-            if not bot_config or not bot_config._bot:
+            if not bot_config:
                 logger.warning(f"[lark] 未找到 bot_key={bot_key[:10]}... 的配置")
                 return None
 
-            platform_cfg = bot_config._bot.get_platform_config()
+            platform_cfg = bot_config.get_platform_config()
             app_id = platform_cfg.get("app_id", "")
             app_secret = platform_cfg.get("app_secret", "")
             encrypt_key = platform_cfg.get("encrypt_key")
@@ -289,7 +289,7 @@ class LarkAdapter(ChannelAdapter):
                 logger.warning(f"[lark] bot_key={bot_key[:10]}... 未配置 app_id/app_secret")
                 return None
 
-            return LarkClient(
+            return get_lark_client(
                 app_id=app_id,
                 app_secret=app_secret,
                 encrypt_key=encrypt_key,
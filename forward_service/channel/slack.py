@@ -200,7 +200,7 @@ class SlackAdapter(ChannelAdapter):
         """
         根据 bot_key 获取 SlackClient 实例
 
-        从 Bot 配置中读取 bot_token，创建并返回 SlackClient 实例。
+        从 Bot 配置中读取 bot_token，返回复用的 SlackClient 实例。
 
         Returns:
             SlackClient 实例，如果配置不存在返回 None
@@ -210,21 +210,21 @@ class SlackAdapter(ChannelAdapter):
 
         try:
             from ..config import config
-            from ..clients.slack import SlackClient
+            from ..clients.slack import get_slack_client
 
             bot_config = config.get_bot(bot_key)
-            if not bot_config or not bot_config._bot:
+            if not bot_config:
                 logger.warning(f"[slack] 未找到 bot_key={bot_key[:10]}... 的配置")
                 return None
 
-            platform_cfg = bot_config._bot.get_platform_config()
+            platform_cfg = bot_config.get_platform_config()
             bot_token = platform_cfg.get("bot_token", "")
 
             if not bot_token:
                 logger.warning(f"[slack] bot_key={bot_key[:10]}... 未配置 bot_token")
                 return None
 
-            return SlackClient(bot_token=bot_token)
+            return get_slack_client(bot_token)
 
         except Exception as e:
             logger.error(f"[slack] 创建 SlackClient 失败: {e}", exc_info=True)
@@ -199,7 +199,7 @@ class TelegramAdapter(ChannelAdapter):
         根据 bot_key 获取 TelegramClient 实例
 
         从 Bot 配置中读取 bot_token 和 secret_token，
-        创建并返回 TelegramClient 实例。
+        返回复用的 TelegramClient 实例。
 
         Returns:
             TelegramClient 实例，如果配置不存在返回 None
@@ -209,14 +209,14 @@ class TelegramAdapter(ChannelAdapter):
 
         try:
             from ..config import config
-            from ..clients.telegram import TelegramClient
+            from ..clients.telegram import get_telegram_client
 
             bot_config = config.get_bot(bot_key)
-            if not bot_config or not bot_config._bot:
+            if not bot_config:
                 logger.warning(f"[telegram] 未找到 bot_key={bot_key[:10]}... 的配置")
                 return None
 
-            platform_cfg = bot_config._bot.get_platform_config()
+            platform_cfg = bot_config.get_platform_config()
             bot_token = platform_cfg.get("bot_token", "")
             secret_token = platform_cfg.get("secret_token", "")
 
@@ -224,7 +224,7 @@ class TelegramAdapter(ChannelAdapter):
                 logger.warning(f"[telegram] bot_key={bot_key[:10]}... 未配置 bot_token")
                 return None
 
-            return TelegramClient(bot_token=bot_token, secret_token=secret_token or None)
+            return get_telegram_client(bot_token=bot_token, secret_token=secret_token or None)
 
         except Exception as e:
             logger.error(f"[telegram] 创建 TelegramClient 失败: {e}", exc_info=True)
@@ -115,10 +115,7 @@ class WeComAdapter(ChannelAdapter):
         4. 调用 fly-pigeon 发送
         """
         try:
-            from ..message_splitter import (
-                split_and_format_message,
-                needs_split,
-            )
+            from ..message_splitter import needs_split
 
             text = message.text
             short_id = message.short_id
@@ -327,22 +324,23 @@ class WeComAdapter(ChannelAdapter):
 
     async def _send_split(self, message: OutboundMessage) -> SendResult:
         """分拆消息并逐条发送"""
-        from ..message_splitter import split_and_format_message
+        from ..message_splitter import split_and_format_message_contents
 
         try:
-            split_messages = split_and_format_message(
+            contents = split_and_format_message_contents(
                 message=message.text,
                 short_id=message.short_id or "",
                 project_name=message.project_name,
             )
+            total_parts = len(contents)
 
             logger.info(
-                f"消息分拆为 {len(split_messages)} 条: chat_id={message.chat_id}"
+                f"消息分拆为 {total_parts} 条: chat_id={message.chat_id}"
             )
 
-            for split_msg in split_messages:
+            for part_number, content in enumerate(contents, 1):
                 result = self._send_raw(
-                    text=split_msg.content,
+                    text=content,
                     chat_id=message.chat_id,
                     msg_type=message.msg_type,
                     bot_key=message.bot_key,
@@ -352,11 +350,11 @@ class WeComAdapter(ChannelAdapter):
                 if isinstance(result, dict) and result.get("errcode", 0) != 0:
                     return SendResult(
                         success=False,
-                        parts_sent=split_msg.part_number - 1,
-                        error=f"第 {split_msg.part_number}/{split_msg.total_parts} 条消息发送失败: {result.get('errmsg', '未知错误')}",
+                        parts_sent=part_number - 1,
+                        error=f"第 {part_number}/{total_parts} 条消息发送失败: {result.get('errmsg', '未知错误')}",
                     )
 
-            return SendResult(success=True, parts_sent=len(split_messages))
+            return SendResult(success=True, parts_sent=total_parts)
 
         except Exception as e:
             logger.error(f"分拆消息发送失败: {e}", exc_info=True)
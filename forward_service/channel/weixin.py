@@ -405,8 +405,8 @@ class WeixinAdapter(ChannelAdapter):
         try:
             from ..config import config
             bot_config = config.get_bot_or_default(bot_key)
-            if bot_config and bot_config._bot:
-                pc = bot_config._bot.get_platform_config()
+            if bot_config:
+                pc = bot_config.get_platform_config()
                 cdn_base_url = pc.get("cdn_base_url", DEFAULT_CDN_BASE_URL)
         except Exception:
             pass
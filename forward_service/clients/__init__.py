@@ -8,8 +8,31 @@ This package contains client implementations for different IM platforms:
 - telegram: Telegram 客户端
 - lark: 飞书客户端
 """
-from .slack import SlackClient
-from .telegram import TelegramClient
-from .lark import LarkClient
+from .slack import SlackClient, get_slack_client, close_slack_clients
+from .telegram import (
+    TelegramClient,
+    ParsedTelegramUpdate,
+    get_telegram_client,
+    close_telegram_clients,
+)
+from .lark import LarkClient, ParsedLarkEvent, get_lark_client, close_lark_clients
 
-__all__ = ["SlackClient", "TelegramClient", "LarkClient"]
+
+async def close_all_clients() -> None:
+    """关闭所有复用中的平台客户端（应用关闭时调用）"""
+    await close_slack_clients()
+    await close_telegram_clients()
+    await close_lark_clients()
+
+
+__all__ = [
+    "SlackClient",
+    "TelegramClient",
+    "LarkClient",
+    "ParsedTelegramUpdate",
+    "ParsedLarkEvent",
+    "get_slack_client",
+    "get_telegram_client",
+    "get_lark_client",
+    "close_all_clients",
+]
@@ -6,12 +6,16 @@ Discord Bot 客户端
 - 发送消息
 - 处理 DM (Direct Message)
 """
+import asyncio
 import logging
-from typing import Optional, Callable
+from typing import Dict, Optional, Callable
 import discord
 
 logger = logging.getLogger(__name__)
 
+# 同时执行的消息回调上限（discord.py 为每个事件单独建 task，突发私信时需要限流）
+MAX_CONCURRENT_CALLBACKS = 100
+
 
 class DiscordBotClient(discord.Client):
     """Discord Bot 客户端，处理 DM 消息"""
@@ -41,6 +45,9 @@ class DiscordBotClient(discord.Client):
         self.bot_token = bot_token
         self.on_message_callback = on_message_callback
         self.bot_key = bot_key
+        self._callback_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLBACKS)
+        # user_id -> DM 频道，避免每次发送都 fetch_user + create_dm
+        self._dm_channel_cache: Dict[int, discord.DMChannel] = {}
     
     async def on_ready(self):
         """Bot 就绪事件"""
@@ -66,9 +73,10 @@ class DiscordBotClient(discord.Client):
         
         logger.info(f"📨 收到 DM: user={message.author} (ID: {message.author.id})")
         
-        # 调用回调处理消息
+        # 调用回调处理消息（discord.py 已在独立 task 中分发事件，不会阻塞网关读取）
         try:
-            await self.on_message_callback(message, self)
+            async with self._callback_semaphore:
+                await self.on_message_callback(message, self)
         except Exception as e:
             logger.error(f"处理消息回调失败: {e}", exc_info=True)
     
@@ -90,18 +98,22 @@ class DiscordBotClient(discord.Client):
             发送的消息对象，失败返回 None
         """
         try:
-            user = await self.fetch_user(user_id)
-            if not user:
-                logger.error(f"无法找到用户: {user_id}")
-                return None
-            
-            # 创建 DM 频道
-            dm_channel = await user.create_dm()
+            dm_channel = self._dm_channel_cache.get(user_id)
+            if dm_channel is None:
+                # 优先用本地缓存的用户和频道，缺失时才请求 API
+                user = self.get_user(user_id) or await self.fetch_user(user_id)
+                if not user:
+                    logger.error(f"无法找到用户: {user_id}")
+                    return None
+                
+                dm_channel = user.dm_channel or await user.create_dm()
+                self._dm_channel_cache[user_id] = dm_channel
             
             # 发送消息
             return await dm_channel.send(content=content, embed=embed)
         
         except discord.Forbidden:
+            self._dm_channel_cache.pop(user_id, None)
             logger.error(f"无权限向用户发送 DM: {user_id}")
             return None
         except Exception as e:
@@ -7,17 +7,102 @@
 - Webhook 处理
 - 事件解密
 """
+import asyncio
 import logging
-import json
 import time
 import base64
 import hashlib
-from typing import Optional, Dict, Any
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import unpad
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.padding import PKCS7
+
+import httpx
+import orjson
+
+from ..utils.batching import MessageBatcher
 
 logger = logging.getLogger(__name__)
 
+# 共享 HTTP 客户端的连接池上限
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+# 后台刷新 token 的提前量（秒），以及多久未使用后停止后台刷新（秒）
+TOKEN_REFRESH_AHEAD = 600
+TOKEN_IDLE_TIMEOUT = 1800
+
+# 批量发送时的最大并发请求数
+BULK_SEND_CONCURRENCY = 20
+
+
+@dataclass(slots=True, frozen=True)
+class ParsedLarkEvent:
+    """飞书事件解析结果"""
+    event_id: Optional[str]
+    event_type: Optional[str]
+    chat_id: Optional[str]
+    user_id: Optional[str]
+    open_id: Optional[str]
+    message_id: Optional[str]
+    message_type: Optional[str]
+    text: Optional[str]
+    timestamp: int
+    raw: Dict[str, Any]
+
+
+def _text_card(title: str, content: str, note: Optional[str] = None) -> dict:
+    """构建简单文本卡片配置"""
+    card = {
+        "config": {
+            "wide_screen_mode": True
+        },
+        "header": {
+            "title": {
+                "tag": "plain_text",
+                "content": title
+            }
+        },
+        "elements": [
+            {
+                "tag": "div",
+                "text": {
+                    "tag": "plain_text",
+                    "content": content
+                }
+            }
+        ]
+    }
+    
+    if note:
+        card["elements"].append({
+            "tag": "note",
+            "elements": [
+                {
+                    "tag": "plain_text",
+                    "content": note
+                }
+            ]
+        })
+    
+    return card
+
+
+def _compile_card_template(title: str, note: Optional[str] = None) -> tuple[str, str]:
+    """
+    预序列化标题/备注固定的文本卡片
+    
+    Returns:
+        (prefix, suffix)：正文 JSON 字符串两侧的片段，prefix + orjson.dumps(正文) + suffix 即完整卡片
+    """
+    placeholder = "\x00content\x00"
+    serialized = orjson.dumps(_text_card(title, placeholder, note)).decode()
+    prefix, _, suffix = serialized.partition(orjson.dumps(placeholder).decode())
+    return prefix, suffix
+
+
+# Agent 回复卡片模板（模块加载时序列化一次）
+_AGENT_REPLY_CARD = _compile_card_template("Agent 回复", "由 AI Agent 生成")
+
 
 class LarkClient:
     """飞书/Lark Bot API 客户端"""
@@ -44,9 +129,38 @@ class LarkClient:
         self.verification_token = verification_token
         self.base_url = "https://open.feishu.cn/open-apis"
         
+        # 事件解密密钥：飞书规定为 SHA-256(encrypt_key)，初始化时计算一次
+        self._aes_key = hashlib.sha256(encrypt_key.encode("utf-8")).digest() if encrypt_key else None
+        
         # Token 缓存
         self._access_token = None
         self._token_expire_time = 0
+        self._auth_headers: Dict[str, str] = {}  # 随 token 刷新一起更新
+        self._token_lock = asyncio.Lock()
+        self._token_refresh_task: Optional[asyncio.Task] = None
+        self._last_used_at = 0.0
+        
+        # 共享 HTTP 客户端（首次使用时创建，复用连接）
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        # 合并发送队列（enqueue 使用）
+        self._batcher = MessageBatcher(self.send_text)
+    
+    def _get_http(self) -> httpx.AsyncClient:
+        """获取共享的 HTTP 客户端（惰性创建）"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(timeout=30.0, limits=HTTP_LIMITS)
+        return self._http
+    
+    async def close(self) -> None:
+        """关闭底层 HTTP 客户端，释放连接池"""
+        await self._batcher.close()
+        if self._token_refresh_task is not None:
+            self._token_refresh_task.cancel()
+            self._token_refresh_task = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
     # ============== Token 管理 ==============
     
@@ -54,20 +168,35 @@ class LarkClient:
         """
         获取 tenant_access_token
         
+        token 有效时无锁直接返回；需要刷新时通过锁保证并发请求只触发一次登录。
+        
         Args:
             force_refresh: 是否强制刷新 token
         
         Returns:
             access_token
         """
-        import httpx
-        
-        # 检查缓存
+        self._last_used_at = time.time()
+        
+        # 快速路径：缓存有效时无需加锁
+        token, expire_time = self._access_token, self._token_expire_time
+        if not force_refresh and token and int(time.time()) < expire_time:
+            return token
+        
+        async with self._token_lock:
+            # 双重检查：等锁期间其它协程可能已经刷新过
+            refreshed = self._token_expire_time != expire_time
+            if (
+                self._access_token
+                and int(time.time()) < self._token_expire_time
+                and (refreshed or not force_refresh)
+            ):
+                return self._access_token
+            return await self._fetch_tenant_access_token()
+    
+    async def _fetch_tenant_access_token(self) -> str:
+        """请求新的 tenant_access_token（调用方需持有 _token_lock）"""
         current_time = int(time.time())
-        if not force_refresh and self._access_token and current_time < self._token_expire_time:
-            return self._access_token
-        
-        # 请求新 token
         url = f"{self.base_url}/auth/v3/tenant_access_token/internal"
         payload = {
             "app_id": self.app_id,
@@ -75,24 +204,52 @@ class LarkClient:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("code") != 0:
-                    raise Exception(f"获取 token 失败: {data.get('msg')}")
-                
-                self._access_token = data["tenant_access_token"]
-                # Token 有效期 2 小时，提前 5 分钟刷新
-                self._token_expire_time = current_time + data.get("expire", 7200) - 300
-                
-                logger.info(f"获取 Lark tenant_access_token 成功，有效期至: {self._token_expire_time}")
-                return self._access_token
+            response = await self._get_http().post(url, json=payload, timeout=10.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("code") != 0:
+                raise Exception(f"获取 token 失败: {data.get('msg')}")
+            
+            self._access_token = data["tenant_access_token"]
+            self._auth_headers = {
+                "Authorization": f"Bearer {self._access_token}",
+                "Content-Type": "application/json"
+            }
+            # Token 有效期 2 小时，提前 5 分钟刷新
+            self._token_expire_time = current_time + data.get("expire", 7200) - 300
+            
+            logger.info(f"获取 Lark tenant_access_token 成功，有效期至: {self._token_expire_time}")
         
         except Exception as e:
             logger.error(f"获取 Lark token 失败: {e}", exc_info=True)
             raise
+        
+        # 首次获取成功后启动后台刷新，使发送路径不必等待登录请求
+        if self._token_refresh_task is None:
+            self._token_refresh_task = asyncio.create_task(self._token_refresher())
+        return self._access_token
+    
+    async def _token_refresher(self) -> None:
+        """后台在 token 过期前刷新；长时间未使用则停止，下次发送时再按需获取"""
+        try:
+            while True:
+                delay = self._token_expire_time - time.time() - TOKEN_REFRESH_AHEAD
+                await asyncio.sleep(max(delay, 60.0))
+                
+                if time.time() - self._last_used_at > TOKEN_IDLE_TIMEOUT:
+                    logger.debug(f"Lark token 长时间未使用，停止后台刷新: app_id={self.app_id}")
+                    return
+                
+                async with self._token_lock:
+                    await self._fetch_tenant_access_token()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"后台刷新 Lark token 失败，改为下次发送时获取: {e}")
+        finally:
+            if self._token_refresh_task is asyncio.current_task():
+                self._token_refresh_task = None
     
     # ============== 消息发送 ==============
     
@@ -115,21 +272,15 @@ class LarkClient:
         Returns:
             发送结果
         """
-        import httpx
-        
-        token = await self.get_tenant_access_token()
+        await self.get_tenant_access_token()
         url = f"{self.base_url}/im/v1/messages"
-        
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+        headers = self._auth_headers
         
         # 构建消息内容
         if isinstance(content, str):
             content_str = content
         else:
-            content_str = json.dumps(content)
+            content_str = orjson.dumps(content).decode()
         
         payload = {
             "receive_id": receive_id,
@@ -142,20 +293,46 @@ class LarkClient:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, headers=headers, json=payload, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("code") != 0:
-                    raise Exception(f"发送消息失败: {data.get('msg')}")
-                
-                return data["data"]
+            response = await self._get_http().post(
+                url, headers=headers, content=orjson.dumps(payload), params=params
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("code") != 0:
+                raise Exception(f"发送消息失败: {data.get('msg')}")
+            
+            return data["data"]
         
         except Exception as e:
             logger.error(f"发送 Lark 消息失败: {e}", exc_info=True)
             raise
     
+    async def send_messages_bulk(self, messages: List[Dict[str, Any]]) -> List[Any]:
+        """
+        并发发送多条消息（最多 BULK_SEND_CONCURRENCY 条同时在途）
+        
+        Args:
+            messages: 消息参数列表，每项为 send_message() 的关键字参数，
+                如 {"receive_id": ..., "msg_type": "text", "content": {...}}
+        
+        Returns:
+            与 messages 一一对应的结果列表，发送失败的项为对应的异常对象
+        """
+        if not messages:
+            return []
+        
+        # 先获取一次 token，避免并发请求各自触发刷新
+        await self.get_tenant_access_token()
+        
+        semaphore = asyncio.Semaphore(BULK_SEND_CONCURRENCY)
+        
+        async def _send(kwargs: Dict[str, Any]) -> Any:
+            async with semaphore:
+                return await self.send_message(**kwargs)
+        
+        return await asyncio.gather(*(_send(m) for m in messages), return_exceptions=True)
+    
     async def send_text(
         self,
         receive_id: str,
@@ -176,6 +353,18 @@ class LarkClient:
         content = {"text": text}
         return await self.send_message(receive_id, "text", content, receive_id_type)
     
+    async def enqueue(self, chat_id: str, text: str) -> None:
+        """
+        投递文本消息，短时间内发往同一 chat 的多条消息会合并为一次发送
+        
+        不等待发送结果，失败只记录日志。
+        
+        Args:
+            chat_id: 会话 ID
+            text: 文本内容
+        """
+        await self._batcher.enqueue(chat_id, text)
+    
     async def send_rich_text(
         self,
         receive_id: str,
@@ -251,27 +440,29 @@ class LarkClient:
         Returns:
             解密后的事件对象
         """
-        if not self.encrypt_key:
+        if not self._aes_key:
             raise ValueError("未配置 encrypt_key，无法解密事件")
         
         try:
-            # Base64 解码
+            # Base64 解码，前 16 字节为 IV
             encrypted_bytes = base64.b64decode(encrypted)
+            iv, ciphertext = encrypted_bytes[:16], encrypted_bytes[16:]
             
-            # AES-256-CBC 解密
-            key = self.encrypt_key.encode("utf-8")
-            cipher = AES.new(key, AES.MODE_CBC, key[:16])
-            decrypted = unpad(cipher.decrypt(encrypted_bytes), AES.block_size)
+            # AES-256-CBC 解密 (OpenSSL 实现，支持 AES-NI)
+            decryptor = Cipher(algorithms.AES(self._aes_key), modes.CBC(iv)).decryptor()
+            padded = decryptor.update(ciphertext) + decryptor.finalize()
+            unpadder = PKCS7(128).unpadder()
+            decrypted = unpadder.update(padded) + unpadder.finalize()
             
             # 解析 JSON
-            event = json.loads(decrypted.decode("utf-8"))
+            event = orjson.loads(decrypted)
             return event
         
         except Exception as e:
             logger.error(f"解密事件失败: {e}", exc_info=True)
             raise
     
-    def parse_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+    def parse_event(self, event: Dict[str, Any]) -> ParsedLarkEvent:
         """
         解析飞书事件对象
         
@@ -279,18 +470,7 @@ class LarkClient:
             event: 事件对象
         
         Returns:
-            解析后的统一格式:
-            {
-                "event_id": str,
-                "event_type": str,
-                "chat_id": str,
-                "user_id": str,
-                "open_id": str,
-                "message_id": str,
-                "text": str,
-                "timestamp": int,
-                "raw": dict
-            }
+            解析后的统一格式 ParsedLarkEvent
         """
         header = event.get("header", {})
         event_data = event.get("event", {})
@@ -298,29 +478,33 @@ class LarkClient:
         # 提取消息内容
         message = event_data.get("message", {})
         sender = event_data.get("sender", {})
+        sender_id = sender.get("sender_id", {})
         
         # 解析消息文本 (可能是 JSON 格式)
         content = message.get("content")
         text = None
         if content:
-            try:
-                content_obj = json.loads(content)
-                text = content_obj.get("text")
-            except:
+            # 只有看起来是 JSON 对象时才解析，纯文本直接使用，避免异常开销
+            if content.startswith("{"):
+                try:
+                    text = orjson.loads(content).get("text")
+                except orjson.JSONDecodeError:
+                    text = content
+            else:
                 text = content
         
-        return {
-            "event_id": header.get("event_id"),
-            "event_type": header.get("event_type"),
-            "chat_id": message.get("chat_id"),
-            "user_id": sender.get("sender_id", {}).get("user_id"),
-            "open_id": sender.get("sender_id", {}).get("open_id"),
-            "message_id": message.get("message_id"),
-            "message_type": message.get("message_type"),
-            "text": text,
-            "timestamp": int(header.get("create_time", 0)) // 1000,  # 毫秒转秒
-            "raw": event
-        }
+        return ParsedLarkEvent(
+            event_id=header.get("event_id"),
+            event_type=header.get("event_type"),
+            chat_id=message.get("chat_id"),
+            user_id=sender_id.get("user_id"),
+            open_id=sender_id.get("open_id"),
+            message_id=message.get("message_id"),
+            message_type=message.get("message_type"),
+            text=text,
+            timestamp=int(header.get("create_time", 0)) // 1000,  # 毫秒转秒
+            raw=event
+        )
     
     # ============== 卡片构建 ==============
     
@@ -341,43 +525,11 @@ class LarkClient:
         Returns:
             卡片配置
         """
-        card = {
-            "config": {
-                "wide_screen_mode": True
-            },
-            "header": {
-                "title": {
-                    "tag": "plain_text",
-                    "content": title
-                }
-            },
-            "elements": [
-                {
-                    "tag": "div",
-                    "text": {
-                        "tag": "plain_text",
-                        "content": content
-                    }
-                }
-            ]
-        }
-        
-        if note:
-            card["elements"].append({
-                "tag": "note",
-                "elements": [
-                    {
-                        "tag": "plain_text",
-                        "content": note
-                    }
-                ]
-            })
-        
-        return card
+        return _text_card(title, content, note)
     
     # ============== 辅助方法 ==============
     
-    def format_agent_response(self, response: str, use_card: bool = False) -> tuple[str, dict]:
+    def format_agent_response(self, response: str, use_card: bool = False) -> tuple[str, dict | str]:
         """
         格式化 Agent 响应为飞书消息
         
@@ -386,15 +538,58 @@ class LarkClient:
             use_card: 是否使用卡片格式
         
         Returns:
-            (msg_type, content)
+            (msg_type, content)，卡片格式时 content 为已序列化的 JSON 字符串
         """
         # 如果响应太长，使用卡片格式
         if len(response) > 2000 or use_card:
-            card = self.build_text_card(
-                title="Agent 回复",
-                content=response[:4000],  # 卡片内容限制
-                note="由 AI Agent 生成"
-            )
-            return "interactive", card
+            # 标题和备注固定，只需把正文（卡片内容限制 4000 字）拼进预序列化模板
+            prefix, suffix = _AGENT_REPLY_CARD
+            return "interactive", f"{prefix}{orjson.dumps(response[:4000]).decode()}{suffix}"
         else:
             return "text", {"text": response}
+
+
+# ============== 客户端复用 ==============
+
+# app_id -> LarkClient，复用实例以共享连接池和 token 缓存
+_clients: Dict[str, LarkClient] = {}
+
+
+def get_lark_client(
+    app_id: str,
+    app_secret: str,
+    encrypt_key: Optional[str] = None,
+    verification_token: Optional[str] = None
+) -> LarkClient:
+    """
+    获取指定应用的 LarkClient（按 app_id 复用，凭证变化时重建）
+    
+    Args:
+        app_id: 应用 ID
+        app_secret: 应用 Secret
+        encrypt_key: 加密密钥 (可选)
+        verification_token: 验证 Token (可选)
+    
+    Returns:
+        LarkClient 实例
+    """
+    client = _clients.get(app_id)
+    if client is None or (
+        client.app_secret, client.encrypt_key, client.verification_token
+    ) != (app_secret, encrypt_key, verification_token):
+        client = LarkClient(
+            app_id=app_id,
+            app_secret=app_secret,
+            encrypt_key=encrypt_key,
+            verification_token=verification_token
+        )
+        _clients[app_id] = client
+    return client
+
+
+async def close_lark_clients() -> None:
+    """关闭所有复用中的 LarkClient"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
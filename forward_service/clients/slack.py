@@ -6,12 +6,23 @@ Slack Web API 客户端
 - 更新消息
 - 下载文件
 """
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, BinaryIO, Dict, List, Optional
 import httpx
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# 共享 HTTP 客户端的连接池上限
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+# 批量发送时的最大并发请求数
+BULK_SEND_CONCURRENCY = 20
+
+# 文件下载的分块大小
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 
 class SlackClient:
     """Slack Web API 客户端"""
@@ -25,6 +36,25 @@ class SlackClient:
         """
         self.bot_token = bot_token
         self.base_url = "https://slack.com/api"
+        
+        # 请求头（bot_token 不变，初始化时构建一次）
+        self._download_headers = {"Authorization": f"Bearer {bot_token}"}
+        self._json_headers = {**self._download_headers, "Content-Type": "application/json"}
+        
+        # 共享 HTTP 客户端（首次使用时创建，复用连接）
+        self._http: Optional[httpx.AsyncClient] = None
+    
+    def _get_http(self) -> httpx.AsyncClient:
+        """获取共享的 HTTP 客户端（惰性创建）"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(limits=HTTP_LIMITS)
+        return self._http
+    
+    async def close(self) -> None:
+        """关闭底层 HTTP 客户端，释放连接池"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
     async def post_message(
         self,
@@ -46,10 +76,7 @@ class SlackClient:
             Slack API 响应
         """
         url = f"{self.base_url}/chat.postMessage"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.bot_token}"
-        }
+        headers = self._json_headers
         
         payload = {
             "channel": channel,
@@ -63,20 +90,38 @@ class SlackClient:
             payload["blocks"] = blocks
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-                result = response.json()
-                
-                if not result.get("ok"):
-                    logger.error(f"Slack API 错误: {result.get('error')}")
-                    raise Exception(f"Slack API 错误: {result.get('error')}")
-                
-                return result
+            response = await self._get_http().post(url, headers=headers, content=orjson.dumps(payload))
+            response.raise_for_status()
+            result = response.json()
+            
+            if not result.get("ok"):
+                logger.error(f"Slack API 错误: {result.get('error')}")
+                raise Exception(f"Slack API 错误: {result.get('error')}")
+            
+            return result
         except Exception as e:
             logger.error(f"发送 Slack 消息失败: {e}")
             raise
     
+    async def send_messages_bulk(self, messages: List[Dict[str, Any]]) -> List[Any]:
+        """
+        并发发送多条消息（最多 BULK_SEND_CONCURRENCY 条同时在途）
+        
+        Args:
+            messages: 消息参数列表，每项为 post_message() 的关键字参数，
+                如 {"channel": ..., "text": ..., "thread_ts": ...}
+        
+        Returns:
+            与 messages 一一对应的结果列表，发送失败的项为对应的异常对象
+        """
+        semaphore = asyncio.Semaphore(BULK_SEND_CONCURRENCY)
+        
+        async def _send(kwargs: Dict[str, Any]) -> Any:
+            async with semaphore:
+                return await self.post_message(**kwargs)
+        
+        return await asyncio.gather(*(_send(m) for m in messages), return_exceptions=True)
+    
     async def update_message(
         self,
         channel: str,
@@ -97,10 +142,7 @@ class SlackClient:
             Slack API 响应
         """
         url = f"{self.base_url}/chat.update"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.bot_token}"
-        }
+        headers = self._json_headers
         
         payload = {
             "channel": channel,
@@ -112,39 +154,80 @@ class SlackClient:
             payload["blocks"] = blocks
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-                result = response.json()
-                
-                if not result.get("ok"):
-                    logger.error(f"Slack API 错误: {result.get('error')}")
-                    raise Exception(f"Slack API 错误: {result.get('error')}")
-                
-                return result
+            response = await self._get_http().post(url, headers=headers, content=orjson.dumps(payload))
+            response.raise_for_status()
+            result = response.json()
+            
+            if not result.get("ok"):
+                logger.error(f"Slack API 错误: {result.get('error')}")
+                raise Exception(f"Slack API 错误: {result.get('error')}")
+            
+            return result
         except Exception as e:
             logger.error(f"更新 Slack 消息失败: {e}")
             raise
     
-    async def download_file(self, url: str) -> bytes:
+    async def download_file(self, url: str, dest: str | BinaryIO | None = None) -> Optional[bytes]:
         """
-        从 Slack 下载文件
+        从 Slack 下载文件（分块流式读取）
         
         Args:
             url: 文件下载 URL (url_private_download)
+            dest: 写入目标 (文件路径或二进制文件对象，可选)；不传时返回完整数据
         
         Returns:
-            文件二进制数据
+            文件二进制数据；传入 dest 时写入 dest 并返回 None
         """
-        headers = {
-            "Authorization": f"Bearer {self.bot_token}"
-        }
+        headers = self._download_headers
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=headers)
+            async with self._get_http().stream("GET", url, headers=headers) as response:
                 response.raise_for_status()
-                return response.content
+                
+                if dest is None:
+                    buffer = bytearray()
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        buffer += chunk
+                    return bytes(buffer)
+                
+                if isinstance(dest, str):
+                    with open(dest, "wb") as f:
+                        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                else:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        dest.write(chunk)
+                return None
         except Exception as e:
             logger.error(f"下载 Slack 文件失败: {e}")
             raise
+
+# ============== 客户端复用 ==============
+
+# bot_token -> SlackClient，复用实例以共享连接池
+_clients: Dict[str, SlackClient] = {}
+
+
+def get_slack_client(bot_token: str) -> SlackClient:
+    """
+    获取指定 Bot Token 的 SlackClient（按 token 复用）
+    
+    Args:
+        bot_token: Slack Bot Token
+    
+    Returns:
+        SlackClient 实例
+    """
+    client = _clients.get(bot_token)
+    if client is None:
+        client = SlackClient(bot_token)
+        _clients[bot_token] = client
+    return client
+
+
+async def close_slack_clients() -> None:
+    """关闭所有复用中的 SlackClient"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
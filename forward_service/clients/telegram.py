@@ -7,15 +7,58 @@ Telegram Bot API 客户端
 - 消息解析
 - 内联按钮支持
 """
+import asyncio
 import logging
-import json
-import hashlib
 import hmac
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from dataclasses import dataclass, field
+
+import httpx
+import orjson
+
+from ..utils.batching import MessageBatcher
 
 logger = logging.getLogger(__name__)
 
+# 共享 HTTP 客户端的连接池上限
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+# Agent 回复的操作按钮（固定内容，发送时只读取不修改）
+_AGENT_RESPONSE_KEYBOARD = {
+    "inline_keyboard": [
+        [
+            {"text": "🔄 重新生成", "callback_data": "regenerate"},
+            {"text": "✅ 满意", "callback_data": "satisfied"}
+        ]
+    ]
+}
+
+# 预序列化请求体时使用的请求头
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# 批量发送时的最大并发请求数
+BULK_SEND_CONCURRENCY = 20
+
+# Telegram MarkdownV2 需要转义的字符 -> 转义形式（单次 translate 完成全部替换）
+_MARKDOWN_ESCAPE_TABLE = str.maketrans({c: f"\\{c}" for c in "_*[]()~`>#+-=|{}.!"})
+
+
+@dataclass(slots=True, frozen=True)
+class ParsedTelegramUpdate:
+    """Telegram Update 解析结果"""
+    update_id: Optional[int] = None
+    message_id: Optional[int] = None
+    chat_id: Optional[int] = None
+    chat_type: Optional[str] = None
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    text: Optional[str] = None
+    reply_to_message_id: Optional[int] = None
+    timestamp: Optional[int] = None
+    raw: Dict[str, Any] = field(default_factory=dict)
+
 
 class TelegramClient:
     """Telegram Bot API 客户端"""
@@ -30,7 +73,31 @@ class TelegramClient:
         """
         self.bot_token = bot_token
         self.secret_token = secret_token
+        # 预先编码，验证时直接做常量时间比较
+        self._secret_token_bytes = secret_token.encode("utf-8") if secret_token else None
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        
+        # 共享 HTTP 客户端（首次使用时创建，复用连接）
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        # 合并发送队列（enqueue 使用，Telegram 单条消息上限 4096 字符）
+        self._batcher = MessageBatcher(
+            lambda chat_id, text: self.send_message(chat_id, text),
+            max_chars=4096,
+        )
+    
+    def _get_http(self) -> httpx.AsyncClient:
+        """获取共享的 HTTP 客户端（惰性创建）"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(timeout=30.0, limits=HTTP_LIMITS)
+        return self._http
+    
+    async def close(self) -> None:
+        """关闭底层 HTTP 客户端，释放连接池"""
+        await self._batcher.close()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
     # ============== 消息发送 ==============
     
@@ -55,8 +122,6 @@ class TelegramClient:
         Returns:
             发送结果
         """
-        import httpx
-        
         url = f"{self.base_url}/sendMessage"
         payload = {
             "chat_id": chat_id,
@@ -73,14 +138,44 @@ class TelegramClient:
             payload["reply_markup"] = reply_markup
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                return response.json()
+            response = await self._get_http().post(url, headers=_JSON_HEADERS, content=orjson.dumps(payload))
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             logger.error(f"发送 Telegram 消息失败: {e}", exc_info=True)
             raise
     
+    async def send_messages_bulk(self, messages: List[Dict[str, Any]]) -> List[Any]:
+        """
+        并发发送多条消息（最多 BULK_SEND_CONCURRENCY 条同时在途）
+        
+        Args:
+            messages: 消息参数列表，每项为 send_message() 的关键字参数，
+                如 {"chat_id": ..., "text": ..., "parse_mode": None}
+        
+        Returns:
+            与 messages 一一对应的结果列表，发送失败的项为对应的异常对象
+        """
+        semaphore = asyncio.Semaphore(BULK_SEND_CONCURRENCY)
+        
+        async def _send(kwargs: Dict[str, Any]) -> Any:
+            async with semaphore:
+                return await self.send_message(**kwargs)
+        
+        return await asyncio.gather(*(_send(m) for m in messages), return_exceptions=True)
+    
+    async def enqueue(self, chat_id: int | str, text: str) -> None:
+        """
+        投递文本消息，短时间内发往同一 chat 的多条消息会合并为一次发送
+        
+        不等待发送结果，失败只记录日志。
+        
+        Args:
+            chat_id: 聊天 ID
+            text: 消息文本
+        """
+        await self._batcher.enqueue(str(chat_id), text)
+    
     async def send_photo(
         self,
         chat_id: int | str,
@@ -100,8 +195,6 @@ class TelegramClient:
         Returns:
             发送结果
         """
-        import httpx
-        
         url = f"{self.base_url}/sendPhoto"
         payload = {
             "chat_id": chat_id,
@@ -113,10 +206,9 @@ class TelegramClient:
             if parse_mode:
                 payload["parse_mode"] = parse_mode
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            return response.json()
+        response = await self._get_http().post(url, headers=_JSON_HEADERS, content=orjson.dumps(payload))
+        response.raise_for_status()
+        return response.json()
     
     # ============== Webhook 处理 ==============
     
@@ -130,13 +222,15 @@ class TelegramClient:
         Returns:
             验证结果
         """
-        if not self.secret_token:
+        if self._secret_token_bytes is None:
             # 如果没有配置 secret_token，跳过验证
             return True
+        if secret_token_header is None:
+            return False
         
-        return secret_token_header == self.secret_token
+        return hmac.compare_digest(secret_token_header.encode("utf-8"), self._secret_token_bytes)
     
-    def parse_update(self, update: Dict[str, Any]) -> Dict[str, Any]:
+    def parse_update(self, update: Dict[str, Any]) -> ParsedTelegramUpdate:
         """
         解析 Telegram Update 对象
         
@@ -144,46 +238,32 @@ class TelegramClient:
             update: Update 对象
         
         Returns:
-            解析后的统一格式:
-            {
-                "update_id": int,
-                "message_id": int,
-                "chat_id": int,
-                "user_id": int,
-                "username": str,
-                "text": str,
-                "reply_to_message_id": int | None,
-                "timestamp": int,
-                "raw": dict
-            }
+            解析后的统一格式 ParsedTelegramUpdate（无消息时只有 update_id 和 raw）
         """
         # Telegram Update 可能包含 message, edited_message, channel_post 等
         message = update.get("message") or update.get("edited_message") or update.get("channel_post")
         
         if not message:
             logger.warning(f"Update 中没有消息: {update}")
-            return {
-                "update_id": update.get("update_id"),
-                "raw": update
-            }
+            return ParsedTelegramUpdate(update_id=update.get("update_id"), raw=update)
         
         chat = message.get("chat", {})
         from_user = message.get("from", {})
         
-        return {
-            "update_id": update.get("update_id"),
-            "message_id": message.get("message_id"),
-            "chat_id": chat.get("id"),
-            "chat_type": chat.get("type"),  # private, group, supergroup, channel
-            "user_id": from_user.get("id"),
-            "username": from_user.get("username"),
-            "first_name": from_user.get("first_name"),
-            "last_name": from_user.get("last_name"),
-            "text": message.get("text"),
-            "reply_to_message_id": message.get("reply_to_message", {}).get("message_id"),
-            "timestamp": message.get("date"),
-            "raw": update
-        }
+        return ParsedTelegramUpdate(
+            update_id=update.get("update_id"),
+            message_id=message.get("message_id"),
+            chat_id=chat.get("id"),
+            chat_type=chat.get("type"),  # private, group, supergroup, channel
+            user_id=from_user.get("id"),
+            username=from_user.get("username"),
+            first_name=from_user.get("first_name"),
+            last_name=from_user.get("last_name"),
+            text=message.get("text"),
+            reply_to_message_id=message.get("reply_to_message", {}).get("message_id"),
+            timestamp=message.get("date"),
+            raw=update
+        )
     
     # ============== 文件下载 ==============
 
@@ -199,27 +279,24 @@ class TelegramClient:
         Returns:
             完整文件 URL，失败时返回 None
         """
-        import httpx
-
         url = f"{self.base_url}/getFile"
         payload = {"file_id": file_id}
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                data = response.json()
+            response = await self._get_http().post(url, json=payload, timeout=10.0)
+            response.raise_for_status()
+            data = response.json()
 
-                if not data.get("ok"):
-                    logger.warning(f"getFile 返回错误: {data.get('description')}")
-                    return None
+            if not data.get("ok"):
+                logger.warning(f"getFile 返回错误: {data.get('description')}")
+                return None
 
-                file_path = data.get("result", {}).get("file_path")
-                if not file_path:
-                    logger.warning(f"getFile 结果中无 file_path: file_id={file_id}")
-                    return None
+            file_path = data.get("result", {}).get("file_path")
+            if not file_path:
+                logger.warning(f"getFile 结果中无 file_path: file_id={file_id}")
+                return None
 
-                return f"https://api.telegram.org/file/bot{self.bot_token}/{file_path}"
+            return f"https://api.telegram.org/file/bot{self.bot_token}/{file_path}"
 
         except Exception as e:
             logger.error(f"获取 Telegram 文件 URL 失败: file_id={file_id}, error={e}")
@@ -247,7 +324,8 @@ class TelegramClient:
     
     # ============== 辅助方法 ==============
     
-    def escape_markdown(self, text: str) -> str:
+    @staticmethod
+    def escape_markdown(text: str) -> str:
         """
         转义 Markdown 特殊字符
         
@@ -257,11 +335,7 @@ class TelegramClient:
         Returns:
             转义后的文本
         """
-        # Telegram MarkdownV2 需要转义的字符
-        escape_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        for char in escape_chars:
-            text = text.replace(char, f'\\{char}')
-        return text
+        return text.translate(_MARKDOWN_ESCAPE_TABLE)
     
     def format_agent_response(self, response: str, add_buttons: bool = False) -> tuple[str, Optional[Dict]]:
         """
@@ -282,14 +356,39 @@ class TelegramClient:
         if len(text) > max_length:
             text = text[:max_length - 50] + "\n\n... (消息过长，已截断)"
         
-        # 可选：添加操作按钮
-        reply_markup = None
-        if add_buttons:
-            reply_markup = self.build_inline_keyboard([
-                [
-                    {"text": "🔄 重新生成", "callback_data": "regenerate"},
-                    {"text": "✅ 满意", "callback_data": "satisfied"}
-                ]
-            ])
+        # 可选：添加操作按钮（共享的常量，只读）
+        reply_markup = _AGENT_RESPONSE_KEYBOARD if add_buttons else None
         
         return text, reply_markup
+
+
+# ============== 客户端复用 ==============
+
+# bot_token -> TelegramClient，复用实例以共享连接池
+_clients: Dict[str, TelegramClient] = {}
+
+
+def get_telegram_client(bot_token: str, secret_token: Optional[str] = None) -> TelegramClient:
+    """
+    获取指定 Bot Token 的 TelegramClient（按 token 复用，secret_token 变化时重建）
+    
+    Args:
+        bot_token: Bot Token
+        secret_token: Secret Token (可选)
+    
+    Returns:
+        TelegramClient 实例
+    """
+    client = _clients.get(bot_token)
+    if client is None or client.secret_token != secret_token:
+        client = TelegramClient(bot_token=bot_token, secret_token=secret_token)
+        _clients[bot_token] = client
+    return client
+
+
+async def close_telegram_clients() -> None:
+    """关闭所有复用中的 TelegramClient"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
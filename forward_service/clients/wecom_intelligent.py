@@ -7,13 +7,81 @@
 - 加解密支持
 """
 import logging
+import re
 import time
-import xml.etree.ElementTree as ET
-from typing import Optional, Dict, Any
-from datetime import datetime
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser, fromstring
+from typing import Optional, Dict, Any, Iterable, Iterator
 
 logger = logging.getLogger(__name__)
 
+# 企微回调的开头：可选 BOM、XML 声明，然后是 <xml> 根节点；不匹配的输入无需交给解析器
+_XML_PREFIX_BYTES = re.compile(rb"(?:\xef\xbb\xbf)?\s*(?:<\?xml[^>]*>\s*)?<xml[\s>]")
+_XML_PREFIX_STR = re.compile(r"\ufeff?\s*(?:<\?xml[^>]*>\s*)?<xml[\s>]")
+
+# ============== XML 响应模板 ==============
+# 模块级常量，构建时用 % 一次性填充
+
+_TEXT_XML_TEMPLATE = """<xml>
+    <ToUserName><![CDATA[%s]]></ToUserName>
+    <FromUserName><![CDATA[%s]]></FromUserName>
+    <CreateTime>%d</CreateTime>
+    <MsgType><![CDATA[text]]></MsgType>
+    <Content><![CDATA[%s]]></Content>
+</xml>"""
+
+# 流式消息拆成 Content 前后两段，字节版构建时可把 content 直接拼入
+_STREAM_XML_HEAD_TEMPLATE = """<xml>
+    <ToUserName><![CDATA[%s]]></ToUserName>
+    <FromUserName><![CDATA[%s]]></FromUserName>
+    <CreateTime>%d</CreateTime>
+    <MsgType><![CDATA[stream]]></MsgType>
+    <Stream>
+        <Id><![CDATA[%s]]></Id>
+        <Finish>%d</Finish>
+        <Content><![CDATA["""
+
+_STREAM_XML_TAIL_TEMPLATE = """]]></Content>%s%s
+    </Stream>
+</xml>"""
+
+_STREAM_XML_TEMPLATE = _STREAM_XML_HEAD_TEMPLATE + "%s" + _STREAM_XML_TAIL_TEMPLATE
+
+# 无 Feedback / MsgItem 的流式消息（绝大多数中间分片）
+_STREAM_XML_CHUNK_TAIL = _STREAM_XML_TAIL_TEMPLATE % ("", "")
+_STREAM_XML_CHUNK_TEMPLATE = _STREAM_XML_HEAD_TEMPLATE + "%s" + _STREAM_XML_CHUNK_TAIL
+
+_TEMPLATE_CARD_XML_TEMPLATE = """<xml>
+    <ToUserName><![CDATA[%s]]></ToUserName>
+    <FromUserName><![CDATA[%s]]></FromUserName>
+    <CreateTime>%d</CreateTime>
+    <MsgType><![CDATA[template_card]]></MsgType>
+    <TemplateCard>
+        <CardType><![CDATA[%s]]></CardType>
+        <!-- TODO: 添加更多卡片内容 -->%s
+    </TemplateCard>
+</xml>"""
+
+_MSG_ITEM_IMAGE_XML_TEMPLATE = """
+            <MsgItem>
+                <MsgType><![CDATA[image]]></MsgType>
+                <Image>
+                    <Base64><![CDATA[%s]]></Base64>
+                    <Md5><![CDATA[%s]]></Md5>
+                </Image>
+            </MsgItem>"""
+
+_FEEDBACK_XML_TEMPLATE = """
+        <Feedback>
+            <Id><![CDATA[%s]]></Id>
+        </Feedback>"""
+
+
+def _escape_cdata(content: str) -> str:
+    """拆分内容中的 "]]>"，避免提前结束 CDATA 段（绝大多数内容不含该序列，无需替换）"""
+    if "]]>" in content:
+        content = content.replace("]]>", "]]]]><![CDATA[>")
+    return content
+
 
 class WeComIntelligentClient:
     """企业微信智能机器人客户端"""
@@ -39,40 +107,73 @@ class WeComIntelligentClient:
         Returns:
             解析后的消息字典
         """
+        prefix_re = _XML_PREFIX_STR if isinstance(xml_data, str) else _XML_PREFIX_BYTES
+        if prefix_re.match(xml_data) is None:
+            logger.warning("解析 XML 失败: 不是以 <xml> 开头的消息")
+            raise ValueError("Invalid XML: missing <xml> root")
+        
         try:
-            if isinstance(xml_data, bytes):
-                xml_data = xml_data.decode('utf-8')
-            
-            root = ET.fromstring(xml_data)
-            
-            # 提取基础字段
-            message = {
-                "ToUserName": self._get_text(root, "ToUserName"),
-                "FromUserName": self._get_text(root, "FromUserName"),
-                "CreateTime": self._get_text(root, "CreateTime"),
-                "MsgType": self._get_text(root, "MsgType"),
-                "MsgId": self._get_text(root, "MsgId"),
-            }
-            
-            # 根据消息类型提取内容
-            msg_type = message["MsgType"]
-            
-            if msg_type == "text":
-                message["Content"] = self._get_text(root, "Content")
-            elif msg_type == "event":
-                message["Event"] = self._get_text(root, "Event")
-                message["EventKey"] = self._get_text(root, "EventKey")
-            
-            return message
+            # 字节直接交给 expat（按 XML 声明的编码解码），省去一次整体 UTF-8 解码
+            root = fromstring(xml_data)
+            return self._extract_message(root)
         
         except Exception as e:
-            logger.error(f"解析 XML 失败: {e}", exc_info=True)
+            # 调用方捕获后会记录完整异常，这里不重复渲染 traceback
+            logger.warning("解析 XML 失败: %s", e)
             raise ValueError(f"Invalid XML: {e}")
     
-    def _get_text(self, element: ET.Element, tag: str) -> Optional[str]:
-        """获取 XML 标签的文本内容"""
-        child = element.find(tag)
-        return child.text if child is not None else None
+    def parse_xml_stream(self, chunks: Iterable[bytes | str]) -> Iterator[Dict[str, Any]]:
+        """
+        从分块到达的数据中连续解析多条企微 XML 消息
+        
+        整个流只创建一个增量解析器，每遇到一个 </xml> 产出一条消息。
+        各条消息不能带 <?xml ...?> 声明。
+        
+        Args:
+            chunks: 数据块（字节或字符串），消息边界可以落在任意块中间
+        
+        Yields:
+            解析后的消息字典（字段同 parse_xml）
+        """
+        # 增量解析器要求单一根节点，用一个外层包装节点容纳连续的多条消息
+        parser = XMLPullParser(events=("end",))
+        parser.feed("<stream>")
+        try:
+            for chunk in chunks:
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    if elem.tag == "xml":
+                        yield self._extract_message(elem)
+                        elem.clear()
+        except ParseError as e:
+            logger.warning("解析 XML 流失败: %s", e)
+            raise ValueError(f"Invalid XML: {e}")
+    
+    @staticmethod
+    def _extract_message(root: Element) -> Dict[str, Any]:
+        """从 <xml> 节点提取消息字段"""
+        # 一次遍历子节点建立 tag -> text 索引，避免逐字段 find() 线性扫描
+        children = {child.tag: child.text for child in root}
+        
+        # 提取基础字段
+        message = {
+            "ToUserName": children.get("ToUserName"),
+            "FromUserName": children.get("FromUserName"),
+            "CreateTime": children.get("CreateTime"),
+            "MsgType": children.get("MsgType"),
+            "MsgId": children.get("MsgId"),
+        }
+        
+        # 根据消息类型提取内容
+        msg_type = message["MsgType"]
+        
+        if msg_type == "text":
+            message["Content"] = children.get("Content")
+        elif msg_type == "event":
+            message["Event"] = children.get("Event")
+            message["EventKey"] = children.get("EventKey")
+        
+        return message
     
     # ============== XML 构建 ==============
     
@@ -93,17 +194,7 @@ class WeComIntelligentClient:
         Returns:
             XML 字符串
         """
-        timestamp = int(time.time())
-        
-        xml = f"""<xml>
-    <ToUserName><![CDATA[{to_user}]]></ToUserName>
-    <FromUserName><![CDATA[{from_user}]]></FromUserName>
-    <CreateTime>{timestamp}</CreateTime>
-    <MsgType><![CDATA[text]]></MsgType>
-    <Content><![CDATA[{content}]]></Content>
-</xml>"""
-        
-        return xml
+        return _TEXT_XML_TEMPLATE % (to_user, from_user, int(time.time()), _escape_cdata(content))
     
     def build_stream_xml(
         self,
@@ -130,47 +221,72 @@ class WeComIntelligentClient:
         Returns:
             XML 字符串
         """
-        timestamp = int(time.time())
-        finish_value = 1 if finish else 0
+        # 中间分片没有 Feedback / MsgItem，直接用精简模板
+        if not feedback_id and not (finish and msg_items):
+            return _STREAM_XML_CHUNK_TEMPLATE % (
+                to_user, from_user, int(time.time()), stream_id, finish, _escape_cdata(content)
+            )
+        
+        feedback_xml, msg_items_xml = self._build_stream_extras(finish, feedback_id, msg_items)
+        return _STREAM_XML_TEMPLATE % (
+            to_user, from_user, int(time.time()), stream_id, finish, _escape_cdata(content),
+            feedback_xml, msg_items_xml
+        )
+    
+    def build_stream_xml_bytes(
+        self,
+        to_user: str,
+        from_user: str,
+        stream_id: str,
+        content: str | bytes | bytearray,
+        finish: bool,
+        feedback_id: Optional[str] = None,
+        msg_items: Optional[list] = None
+    ) -> bytes:
+        """
+        构建流式消息 XML（UTF-8 字节）
         
+        content 只编码一次后直接拼入结果，不先拼成完整的 XML 字符串再整体编码，
+        适合较大的回复内容。content 也可以是已编码的 UTF-8 bytes / bytearray
+        （例如用 bytearray 累积的流式输出），此时不再编码。其余参数同 build_stream_xml。
+        
+        Returns:
+            XML 字节
+        """
+        head = _STREAM_XML_HEAD_TEMPLATE % (to_user, from_user, int(time.time()), stream_id, finish)
+        if not feedback_id and not (finish and msg_items):
+            tail = _STREAM_XML_CHUNK_TAIL
+        else:
+            tail = _STREAM_XML_TAIL_TEMPLATE % self._build_stream_extras(finish, feedback_id, msg_items)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        if b"]]>" in content:
+            content = content.replace(b"]]>", b"]]]]><![CDATA[>")
+        return b"".join((head.encode("utf-8"), content, tail.encode("utf-8")))
+    
+    def _build_stream_extras(
+        self,
+        finish: bool,
+        feedback_id: Optional[str],
+        msg_items: Optional[list]
+    ) -> tuple[str, str]:
+        """构建流式消息的 Feedback 和 MsgItem 标签"""
         # 构建 Feedback 标签
-        feedback_xml = ""
-        if feedback_id:
-            feedback_xml = f"""
-        <Feedback>
-            <Id><![CDATA[{feedback_id}]]></Id>
-        </Feedback>"""
+        feedback_xml = _FEEDBACK_XML_TEMPLATE % feedback_id if feedback_id else ""
         
         # 构建 MsgItem 标签
         msg_items_xml = ""
         if msg_items and finish:
-            items = []
-            for item in msg_items[:10]:  # 最多 10 个
-                if item.get("msgtype") == "image":
-                    image = item.get("image", {})
-                    items.append(f"""
-            <MsgItem>
-                <MsgType><![CDATA[image]]></MsgType>
-                <Image>
-                    <Base64><![CDATA[{image.get("base64", "")}]]></Base64>
-                    <Md5><![CDATA[{image.get("md5", "")}]]></Md5>
-                </Image>
-            </MsgItem>""")
-            msg_items_xml = "".join(items)
-        
-        xml = f"""<xml>
-    <ToUserName><![CDATA[{to_user}]]></ToUserName>
-    <FromUserName><![CDATA[{from_user}]]></FromUserName>
-    <CreateTime>{timestamp}</CreateTime>
-    <MsgType><![CDATA[stream]]></MsgType>
-    <Stream>
-        <Id><![CDATA[{stream_id}]]></Id>
-        <Finish>{finish_value}</Finish>
-        <Content><![CDATA[{content}]]></Content>{feedback_xml}{msg_items_xml}
-    </Stream>
-</xml>"""
+            msg_items_xml = "".join([
+                _MSG_ITEM_IMAGE_XML_TEMPLATE % (image.get("base64", ""), image.get("md5", ""))
+                for image in (
+                    item.get("image", {})
+                    for item in msg_items[:10]  # 最多 10 个
+                    if item.get("msgtype") == "image"
+                )
+            ])
         
-        return xml
+        return feedback_xml, msg_items_xml
     
     def build_template_card_xml(
         self,
@@ -191,32 +307,16 @@ class WeComIntelligentClient:
         Returns:
             XML 字符串
         """
-        timestamp = int(time.time())
-        
         # 构建 Feedback 标签
-        feedback_xml = ""
-        if feedback_id:
-            feedback_xml = f"""
-        <Feedback>
-            <Id><![CDATA[{feedback_id}]]></Id>
-        </Feedback>"""
+        feedback_xml = _FEEDBACK_XML_TEMPLATE % feedback_id if feedback_id else ""
         
         # TODO: 根据 card_data 构建完整的卡片 XML
         # 这里先提供一个简化版本
         card_type = card_data.get("card_type", "text_notice")
         
-        xml = f"""<xml>
-    <ToUserName><![CDATA[{to_user}]]></ToUserName>
-    <FromUserName><![CDATA[{from_user}]]></FromUserName>
-    <CreateTime>{timestamp}</CreateTime>
-    <MsgType><![CDATA[template_card]]></MsgType>
-    <TemplateCard>
-        <CardType><![CDATA[{card_type}]]></CardType>
-        <!-- TODO: 添加更多卡片内容 -->{feedback_xml}
-    </TemplateCard>
-</xml>"""
-        
-        return xml
+        return _TEMPLATE_CARD_XML_TEMPLATE % (
+            to_user, from_user, int(time.time()), card_type, feedback_xml
+        )
     
     # ============== 辅助方法 ==============
     
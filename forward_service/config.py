@@ -14,6 +14,7 @@ Forward Service 配置管理 - 数据库版本
     config = ConfigDB()
 """
 import logging
+import os
 import re
 from typing import Optional
 from sqlalchemy import select
@@ -29,11 +30,59 @@ logger = logging.getLogger(__name__)
 # 默认超时时间（秒）- 用户项目和 Bot 共用
 DEFAULT_TIMEOUT = 1800  # 30 分钟
 
+# 无权限访问 Bot 时的提示
+_DENY_MSG = "抱歉，您还没有权限访问此 Bot，如有意向，请联系作者。"
+
+# check_access 的返回值 (共享的不可变元组，避免每次调用新建)
+_ALLOW = (True, "")
+_DENY = (False, _DENY_MSG)
+
+# 访问控制模式 -> 整数编码 (check_access 中用整数比较分派)
+_MODE_ALLOW_ALL, _MODE_WHITELIST, _MODE_BLACKLIST = 0, 1, 2
+_MODE_MAP = {
+    "allow_all": _MODE_ALLOW_ALL,
+    "whitelist": _MODE_WHITELIST,
+    "blacklist": _MODE_BLACKLIST,
+}
+
+# webhook URL 中的 key 参数
+_BOT_KEY_RE = re.compile(r'[?&]key=([^&]+)')
+
+# 启动配置相关的环境变量 (导入时读取一次，initialize 中不再逐个 getenv)
+_ENV: dict[str, Optional[str]] = {
+    key: os.getenv(key)
+    for key in (
+        "FORWARD_PORT",
+        "FORWARD_TIMEOUT",
+        "ASYNC_TASK_MAX_CONCURRENCY",
+        "ASYNC_TASK_DEFAULT_TIMEOUT",
+        "ASYNC_TASK_DEFAULT_PROCESSING_MSG",
+        "CALLBACK_AUTH_KEY",
+        "CALLBACK_AUTH_VALUE",
+        "DEFAULT_BOT_KEY",
+    )
+}
+
+
+def _access_rule_rows(
+    whitelist: list[str],
+    blacklist: list[str],
+    whitelist_remark: str = "",
+    blacklist_remark: str = ""
+) -> list[tuple[str, str, str]]:
+    """黑白名单转换为 bulk_create 使用的 (chat_id, rule_type, remark) 列表"""
+    return (
+        [(chat_id, "whitelist", whitelist_remark) for chat_id in whitelist]
+        + [(chat_id, "blacklist", blacklist_remark) for chat_id in blacklist]
+    )
+
 
 # ============== 数据类定义 (与 config_v2 兼容) ==============
 
 class ForwardConfig:
     """转发配置"""
+    __slots__ = ("target_url", "api_key", "timeout")
+
     def __init__(
         self,
         target_url: str,
@@ -59,14 +108,11 @@ class ForwardConfig:
     def from_bot(cls, bot: Chatbot) -> "ForwardConfig":
         """从 Chatbot 模型创建 ForwardConfig"""
         # 优先使用 target_url，如果没有则从旧的 url_template + agent_id 构建
-        if hasattr(bot, 'target_url') and bot.target_url:
-            url = bot.target_url
-        elif hasattr(bot, 'url_template') and bot.url_template:
+        url = bot.target_url
+        if not url:
             # 兼容旧数据：用 agent_id 替换模板
-            url = bot.url_template.replace("{agent_id}", bot.agent_id or "")
-        else:
-            url = ""
-        
+            url = bot.url_template.replace("{agent_id}", bot.agent_id or "") if bot.url_template else ""
+
         return cls(
             target_url=url,
             api_key=bot.api_key or "",
@@ -76,6 +122,8 @@ class ForwardConfig:
 
 class AccessControl:
     """访问控制配置 (与 config_v2.AccessControl 兼容)"""
+    __slots__ = ("mode", "whitelist", "blacklist", "_mode_int", "_whitelist_set", "_blacklist_set")
+
     def __init__(
         self,
         mode: str = "allow_all",
@@ -85,6 +133,10 @@ class AccessControl:
         self.mode = mode
         self.whitelist = whitelist or []
         self.blacklist = blacklist or []
+        # 以下为 check_access 使用的派生值（mode 和列表保留用于序列化，构造后不应再修改）
+        self._mode_int = _MODE_MAP.get(mode, -1)
+        self._whitelist_set = frozenset(self.whitelist)
+        self._blacklist_set = frozenset(self.blacklist)
 
     def to_dict(self) -> dict:
         return {
@@ -122,35 +174,43 @@ class AccessControl:
         
         只要 user_id、chat_id 或 alias 匹配其一即可
         """
-        if self.mode == "allow_all":
-            return True, ""
+        mode = self._mode_int
+        if mode == _MODE_ALLOW_ALL:
+            return _ALLOW
 
-        elif self.mode == "whitelist":
+        if mode == _MODE_WHITELIST:
             # 检查 user_id、chat_id 或 alias 是否在白名单中
-            if user_id in self.whitelist:
-                return True, ""
-            if chat_id and chat_id in self.whitelist:
-                return True, ""
-            if alias and alias in self.whitelist:
-                return True, ""
-            return False, "抱歉，您还没有权限访问此 Bot，如有意向，请联系作者。"
-
-        elif self.mode == "blacklist":
+            whitelist = self._whitelist_set
+            if (
+                user_id in whitelist
+                or (chat_id and chat_id in whitelist)
+                or (alias and alias in whitelist)
+            ):
+                return _ALLOW
+            return _DENY
+
+        if mode == _MODE_BLACKLIST:
             # 检查 user_id、chat_id 或 alias 是否在黑名单中
-            deny_msg = "抱歉，您还没有权限访问此 Bot，如有意向，请联系作者。"
-            if user_id in self.blacklist:
-                return False, deny_msg
-            if chat_id and chat_id in self.blacklist:
-                return False, deny_msg
-            if alias and alias in self.blacklist:
-                return False, deny_msg
-            return True, ""
+            blacklist = self._blacklist_set
+            if (
+                user_id in blacklist
+                or (chat_id and chat_id in blacklist)
+                or (alias and alias in blacklist)
+            ):
+                return _DENY
+            return _ALLOW
 
         return False, "未知的访问控制模式"
 
 
 class BotConfig:
     """Bot 配置 (与 config_v2.BotConfig 兼容)"""
+    __slots__ = (
+        "bot_key", "name", "description", "forward_config", "access_control",
+        "enabled", "owner_id", "platform", "platform_config", "async_mode", "processing_message",
+        "sync_timeout_seconds", "max_task_duration_seconds", "_cached_dict",
+    )
+
     def __init__(
         self,
         bot_key: str,
@@ -160,7 +220,8 @@ class BotConfig:
         access_control: AccessControl | None = None,
         enabled: bool = True,
         owner_id: str | None = None,
-        _bot: Chatbot | None = None,  # 内部使用,保留对数据库模型的引用
+        platform: str | None = None,
+        platform_config: dict | None = None,
         async_mode: bool = False,
         processing_message: str | None = None,
         sync_timeout_seconds: int = 30,
@@ -173,32 +234,46 @@ class BotConfig:
         self.access_control = access_control or AccessControl()
         self.enabled = enabled
         self.owner_id = owner_id
-        self._bot = _bot  # 保留数据库模型引用
+        self.platform = platform
+        self.platform_config = platform_config or {}
         self.async_mode = async_mode
         self.processing_message = processing_message
         self.sync_timeout_seconds = sync_timeout_seconds
         self.max_task_duration_seconds = max_task_duration_seconds
+        self._cached_dict: dict | None = None  # to_dict() 结果缓存
 
     @property
     def is_registered(self) -> bool:
         """Bot 是否已注册（有 owner）"""
         return self.owner_id is not None
 
+    def get_platform_config(self) -> dict:
+        """获取平台特定配置 (如 bot_token、app_id 等)"""
+        return self.platform_config
+
     @property
     def is_configured(self) -> bool:
         """Bot 是否已配置转发目标"""
         return bool(self.forward_config and self.forward_config.get_url())
 
     def to_dict(self) -> dict:
-        return {
-            "bot_key": self.bot_key,
-            "name": self.name,
-            "description": self.description,
-            "forward_config": self.forward_config.to_dict(),
-            "access_control": self.access_control.to_dict(),
-            "enabled": self.enabled,
-            "owner_id": self.owner_id
-        }
+        """
+        序列化为字典
+
+        BotConfig 创建后不再修改 (配置变更时整体替换)，因此结果只构建一次；
+        返回的字典是共享的，调用方不应修改。
+        """
+        if self._cached_dict is None:
+            self._cached_dict = {
+                "bot_key": self.bot_key,
+                "name": self.name,
+                "description": self.description,
+                "forward_config": self.forward_config.to_dict(),
+                "access_control": self.access_control.to_dict(),
+                "enabled": self.enabled,
+                "owner_id": self.owner_id
+            }
+        return self._cached_dict
 
     @classmethod
     def from_bot(cls, bot: Chatbot) -> "BotConfig":
@@ -211,7 +286,8 @@ class BotConfig:
             access_control=AccessControl.from_bot(bot),
             enabled=bot.enabled,
             owner_id=bot.owner_id,
-            _bot=bot,
+            platform=bot.platform,
+            platform_config=bot.get_platform_config(),
             async_mode=bool(getattr(bot, "async_mode", False)),
             processing_message=getattr(bot, "processing_message", None),
             sync_timeout_seconds=int(getattr(bot, "sync_timeout_seconds", 30)),
@@ -219,6 +295,39 @@ class BotConfig:
         )
 
 
+def _bot_summary(bot: Chatbot, counts: dict[str, int]) -> dict:
+    """构建 Bot 列表中单个 Bot 的字典 (list_bots 使用)"""
+    # 优先使用 target_url，兼容 url_template
+    effective_url = bot.target_url or bot.url_template or ""
+    created_at = bot.created_at
+    updated_at = bot.updated_at
+
+    return {
+        "id": bot.id,
+        "bot_key": bot.bot_key,
+        "name": bot.name,
+        "description": bot.description or "",
+        "url_template": effective_url,  # 前端兼容
+        "target_url": effective_url,    # 新字段
+        "agent_id": bot.agent_id or "",
+        "api_key": bot.api_key or "",
+        "timeout": bot.timeout,
+        "access_mode": bot.access_mode,
+        "enabled": bot.enabled,
+        "whitelist_count": counts.get("whitelist", 0),
+        "blacklist_count": counts.get("blacklist", 0),
+        "created_at": created_at.isoformat() if created_at else None,
+        "updated_at": updated_at.isoformat() if updated_at else None,
+        # 异步相关列均为 NOT NULL 且有默认值，直接读取
+        "async_config": {
+            "async_mode": bool(bot.async_mode),
+            "processing_message": bot.processing_message,
+            "sync_timeout_seconds": bot.sync_timeout_seconds,
+            "max_task_duration_seconds": bot.max_task_duration_seconds,
+        },
+    }
+
+
 # ============== 数据库配置类 ==============
 
 class ConfigDB:
@@ -246,23 +355,21 @@ class ConfigDB:
 
     async def initialize(self):
         """初始化配置 - 从数据库加载"""
-        import os
-
         # 从环境变量加载基本配置
-        if os.getenv("FORWARD_PORT"):
-            self.port = int(os.getenv("FORWARD_PORT"))
-        if os.getenv("FORWARD_TIMEOUT"):
-            self.timeout = int(os.getenv("FORWARD_TIMEOUT"))
-        self.async_task_max_concurrency = int(os.getenv("ASYNC_TASK_MAX_CONCURRENCY", "10"))
-        self.async_task_default_timeout = int(os.getenv("ASYNC_TASK_DEFAULT_TIMEOUT", "1800"))
-        self.async_task_default_processing_msg = os.getenv(
-            "ASYNC_TASK_DEFAULT_PROCESSING_MSG", "正在为您处理，请稍候..."
+        if _ENV["FORWARD_PORT"]:
+            self.port = int(_ENV["FORWARD_PORT"])
+        if _ENV["FORWARD_TIMEOUT"]:
+            self.timeout = int(_ENV["FORWARD_TIMEOUT"])
+        self.async_task_max_concurrency = int(_ENV["ASYNC_TASK_MAX_CONCURRENCY"] or "10")
+        self.async_task_default_timeout = int(_ENV["ASYNC_TASK_DEFAULT_TIMEOUT"] or "1800")
+        self.async_task_default_processing_msg = (
+            _ENV["ASYNC_TASK_DEFAULT_PROCESSING_MSG"] or "正在为您处理，请稍候..."
         )
-        self.callback_auth_key = os.getenv("CALLBACK_AUTH_KEY", "")
-        self.callback_auth_value = os.getenv("CALLBACK_AUTH_VALUE", "")
+        self.callback_auth_key = _ENV["CALLBACK_AUTH_KEY"] or ""
+        self.callback_auth_value = _ENV["CALLBACK_AUTH_VALUE"] or ""
 
         # 设置默认 bot_key
-        self.default_bot_key = os.getenv("DEFAULT_BOT_KEY", "")
+        self.default_bot_key = _ENV["DEFAULT_BOT_KEY"] or ""
 
         # 从数据库加载所有 Bot 配置
         await self._load_bots_from_db()
@@ -271,30 +378,55 @@ class ConfigDB:
         logger.info(f"默认 Bot Key: {self.default_bot_key}")
 
     async def _load_bots_from_db(self):
-        """从数据库加载所有 Bot 配置"""
+        """
+        从数据库加载所有 Bot 配置
+
+        先在局部变量中构建完整的新配置，最后整体替换 self.bots，
+        加载期间并发的 get_bot 读到的始终是旧配置或新配置，不会读到空的或不完整的字典。
+        """
         db = get_db_manager()
 
-        async with db.get_session() as session:
+        async with db.get_session_readonly() as session:
             bot_repo = get_chatbot_repository(session)
 
-            # 获取所有 Bot (包括已禁用的)
-            bots = await bot_repo.get_all(enabled_only=False)
+            # 获取所有 Bot (包括已禁用的)，access_rules 随查询一并预加载
+            bots = await bot_repo.get_all(enabled_only=False, include_rules=True)
+
+        new_bots: dict[str, BotConfig] = {}
+        default_bot_key = self.default_bot_key
+
+        # 转换为 BotConfig 对象
+        for bot in bots:
+            new_bots[bot.bot_key] = BotConfig.from_bot(bot)
 
-            # 转换为 BotConfig 对象
-            for bot in bots:
-                # 预加载 access_rules
-                await session.refresh(bot, attribute_names=["access_rules"])
+            # 设置默认 bot_key (如果还没设置)
+            if not default_bot_key and bot.enabled:
+                default_bot_key = bot.bot_key
 
-                bot_config = BotConfig.from_bot(bot)
-                self.bots[bot.bot_key] = bot_config
+        self.bots = new_bots
+        self.default_bot_key = default_bot_key
 
-                # 设置默认 bot_key (如果还没设置)
-                if not self.default_bot_key and bot.enabled:
-                    self.default_bot_key = bot.bot_key
+    async def _refresh_single(self, bot_key: str):
+        """从数据库重新加载单个 Bot 到内存 (Bot 已不存在时从内存移除)"""
+        db = get_db_manager()
+
+        async with db.get_session_readonly() as session:
+            bot_repo = get_chatbot_repository(session)
+            bot = await bot_repo.get_by_bot_key(bot_key, include_rules=True)
+
+            if bot is None:
+                self.bots.pop(bot_key, None)
+                return
+
+            self.bots[bot_key] = BotConfig.from_bot(bot)
+
+            # 设置默认 bot_key (如果还没设置)
+            if not self.default_bot_key and bot.enabled:
+                self.default_bot_key = bot_key
 
     def extract_bot_key_from_webhook_url(self, webhook_url: str) -> Optional[str]:
         """从 webhook_url 提取 bot_key"""
-        match = re.search(r'[?&]key=([^&]+)', webhook_url)
+        match = _BOT_KEY_RE.search(webhook_url)
         if match:
             return match.group(1)
         return None
@@ -336,7 +468,6 @@ class ConfigDB:
     async def reload_config(self) -> dict:
         """重新加载配置 (从数据库)"""
         try:
-            self.bots.clear()
             await self._load_bots_from_db()
             return {"success": True, "message": "配置已重新加载"}
         except Exception as e:
@@ -377,82 +508,62 @@ class ConfigDB:
                 # 更新默认 bot_key
                 self.default_bot_key = data["default_bot_key"]
 
-                # 获取数据库中现有的所有 Bot
-                existing_bots = await bot_repo.get_all(enabled_only=False)
-                existing_bot_keys = {bot.bot_key for bot in existing_bots}
+                # 一次查询取得现有 Bot 的 bot_key -> id，后续据此分派更新/创建
+                existing_ids = await bot_repo.get_id_map()
                 new_bot_keys = set(data["bots"].keys())
 
                 # 删除不再存在的 Bot
-                bot_keys_to_delete = existing_bot_keys - new_bot_keys
-                for bot_key in bot_keys_to_delete:
-                    bot = await bot_repo.get_by_bot_key(bot_key)
-                    if bot:
-                        await bot_repo.delete(bot.id)
-                        logger.info(f"删除 Bot: {bot_key}")
-
-                # 更新或创建 Bot
+                bot_keys_to_delete = existing_ids.keys() - new_bot_keys
+                if bot_keys_to_delete:
+                    await bot_repo.delete_by_bot_keys(bot_keys_to_delete)
+
+                # 收集需要更新/创建的 Bot 行，批量写入 (不逐个 UPDATE/INSERT)
+                update_rows: list[dict] = []
+                create_rows: list[dict] = []
+                rules_by_key: dict[str, list[tuple[str, str, str]]] = {}
+
                 for bot_key, bot_dict in data["bots"].items():
                     forward_config = bot_dict.get("forward_config", {})
                     access_control = bot_dict.get("access_control", {})
+                    values = {
+                        "name": bot_dict.get("name"),
+                        "description": bot_dict.get("description"),
+                        "url_template": forward_config.get("url_template"),
+                        "agent_id": forward_config.get("agent_id"),
+                        "api_key": forward_config.get("api_key"),
+                        "timeout": forward_config.get("timeout"),
+                        "access_mode": access_control.get("mode", "allow_all"),
+                        "enabled": bot_dict.get("enabled", True),
+                    }
+                    # 与单条 update/create 一致：未提供的字段不覆盖现有值，新建时使用默认值
+                    values = {k: v for k, v in values.items() if v is not None}
 
-                    # 检查是否已存在
-                    existing_bot = await bot_repo.get_by_bot_key(bot_key)
-
-                    if existing_bot:
-                        # 更新现有 Bot
-                        await bot_repo.update(
-                            bot_id=existing_bot.id,
-                            name=bot_dict.get("name"),
-                            description=bot_dict.get("description"),
-                            url_template=forward_config.get("url_template"),
-                            agent_id=forward_config.get("agent_id"),
-                            api_key=forward_config.get("api_key"),
-                            timeout=forward_config.get("timeout"),
-                            access_mode=access_control.get("mode", "allow_all"),
-                            enabled=bot_dict.get("enabled", True)
-                        )
-
-                        # 更新访问规则
-                        whitelist = access_control.get("whitelist", [])
-                        blacklist = access_control.get("blacklist", [])
+                    whitelist = access_control.get("whitelist", [])
+                    blacklist = access_control.get("blacklist", [])
 
+                    existing_id = existing_ids.get(bot_key)
+                    if existing_id is not None:
+                        update_rows.append({"id": existing_id, **values})
+                        # 现有 Bot 只有在提供了名单时才替换规则
                         if whitelist or blacklist:
-                            # 清除旧规则并设置新规则
-                            await rule_repo.delete_by_chatbot(existing_bot.id)
-
-                            for chat_id in whitelist:
-                                await rule_repo.create(existing_bot.id, chat_id, "whitelist")
-
-                            for chat_id in blacklist:
-                                await rule_repo.create(existing_bot.id, chat_id, "blacklist")
-
+                            rules_by_key[bot_key] = _access_rule_rows(whitelist, blacklist)
                         logger.info(f"更新 Bot: {bot_key}")
                     else:
-                        # 创建新 Bot
-                        bot = await bot_repo.create(
-                            bot_key=bot_key,
-                            name=bot_dict.get("name"),
-                            description=bot_dict.get("description"),
-                            url_template=forward_config.get("url_template"),
-                            agent_id=forward_config.get("agent_id"),
-                            api_key=forward_config.get("api_key"),
-                            timeout=forward_config.get("timeout", DEFAULT_TIMEOUT),
-                            access_mode=access_control.get("mode", "allow_all"),
-                            enabled=bot_dict.get("enabled", True)
-                        )
-
-                        # 添加访问规则
-                        whitelist = access_control.get("whitelist", [])
-                        blacklist = access_control.get("blacklist", [])
-
-                        for chat_id in whitelist:
-                            await rule_repo.create(bot.id, chat_id, "whitelist")
-
-                        for chat_id in blacklist:
-                            await rule_repo.create(bot.id, chat_id, "blacklist")
-
+                        values.setdefault("timeout", DEFAULT_TIMEOUT)
+                        create_rows.append({"bot_key": bot_key, **values})
+                        rules_by_key[bot_key] = _access_rule_rows(whitelist, blacklist)
                         logger.info(f"创建 Bot: {bot_key}")
 
+                await bot_repo.bulk_update(update_rows)
+                if create_rows:
+                    await bot_repo.bulk_create(create_rows)
+                    # 新建 Bot 的 id 需要再查一次 (MySQL 不支持 INSERT ... RETURNING)
+                    existing_ids = await bot_repo.get_id_map()
+
+                await rule_repo.replace_for_chatbots(
+                    {existing_ids[bot_key]: rules for bot_key, rules in rules_by_key.items()}
+                )
+
             # 重新加载配置到内存
             await self.reload_config()
 
@@ -472,11 +583,6 @@ class ConfigDB:
         if self.default_bot_key and self.default_bot_key not in self.bots:
             errors.append(f"默认 Bot Key '{self.default_bot_key}' 不存在于 bots 配置中")
 
-        for bot_key, bot in self.bots.items():
-            # target_url 现在是可选的，用户可以通过绑定项目来指定转发目标
-            # 所以不再强制验证 target_url
-            pass
-
         return errors
 
     # ============== Bot CRUD 操作 (用于 API) ==============
@@ -490,46 +596,17 @@ class ConfigDB:
         """
         db = get_db_manager()
 
-        async with db.get_session() as session:
+        async with db.get_session_readonly() as session:
             bot_repo = get_chatbot_repository(session)
             rule_repo = get_access_rule_repository(session)
 
             bots = await bot_repo.get_all(enabled_only=False)
 
-            result = []
-            for bot in bots:
-                # 统计访问规则数量
-                whitelist = await rule_repo.get_whitelist(bot.id)
-                blacklist = await rule_repo.get_blacklist(bot.id)
-                
-                # 优先使用 target_url，兼容 url_template
-                effective_url = bot.target_url or bot.url_template or ""
-
-                result.append({
-                    "id": bot.id,
-                    "bot_key": bot.bot_key,
-                    "name": bot.name,
-                    "description": bot.description or "",
-                    "url_template": effective_url,  # 前端兼容
-                    "target_url": effective_url,    # 新字段
-                    "agent_id": bot.agent_id or "",
-                    "api_key": bot.api_key or "",
-                    "timeout": bot.timeout,
-                    "access_mode": bot.access_mode,
-                    "enabled": bot.enabled,
-                    "whitelist_count": len(whitelist),
-                    "blacklist_count": len(blacklist),
-                    "created_at": bot.created_at.isoformat() if bot.created_at else None,
-                    "updated_at": bot.updated_at.isoformat() if bot.updated_at else None,
-                    "async_config": {
-                        "async_mode": bool(getattr(bot, "async_mode", False)),
-                        "processing_message": getattr(bot, "processing_message", None),
-                        "sync_timeout_seconds": int(getattr(bot, "sync_timeout_seconds", 30)),
-                        "max_task_duration_seconds": int(getattr(bot, "max_task_duration_seconds", 1800)),
-                    },
-                })
-
-            return result
+            # 一次查询统计所有 Bot 的访问规则数量
+            rule_counts = await rule_repo.count_by_chatbot()
+
+            no_rules: dict[str, int] = {}
+            return [_bot_summary(bot, rule_counts.get(bot.id, no_rules)) for bot in bots]
 
     async def get_bot_detail(self, bot_key: str) -> dict | None:
         """
@@ -543,7 +620,7 @@ class ConfigDB:
         """
         db = get_db_manager()
 
-        async with db.get_session() as session:
+        async with db.get_session_readonly() as session:
             bot_repo = get_chatbot_repository(session)
             rule_repo = get_access_rule_repository(session)
 
@@ -598,7 +675,10 @@ class ConfigDB:
 
     async def get_bot_or_default_from_db(self, bot_key: str | None) -> Optional[BotConfig]:
         """
-        从数据库获取 Bot 配置，如果指定的 bot_key 不存在，返回默认 Bot
+        获取已启用的 Bot 配置，如果指定的 bot_key 不存在或已禁用，返回默认 Bot
+
+        优先使用内存配置（增删改和 reload_config 都会同步更新）；只有内存中没有
+        指定的 bot_key 时才查询数据库（例如由其它进程新建的 Bot），查到后加入内存。
 
         Args:
             bot_key: Bot Key，可以为 None
@@ -606,44 +686,22 @@ class ConfigDB:
         Returns:
             BotConfig 对象，如果都不存在返回 None
         """
-        db = get_db_manager()
+        # 1. 尝试获取指定的 bot
+        if bot_key:
+            bot = self.bots.get(bot_key)
+            if bot is None:
+                await self._refresh_single(bot_key)
+                bot = self.bots.get(bot_key)
+            if bot and bot.enabled:
+                return bot
+
+        # 2. 尝试获取默认 bot
+        if self.default_bot_key:
+            default_bot = self.bots.get(self.default_bot_key)
+            if default_bot and default_bot.enabled:
+                return default_bot
 
-        async with db.get_session() as session:
-            bot_repo = get_chatbot_repository(session)
-
-            # 1. 尝试获取指定的 bot
-            if bot_key:
-                bot = await bot_repo.get_by_bot_key(bot_key)
-                if bot and bot.enabled:
-                    return BotConfig(
-                        bot_key=bot.bot_key,
-                        name=bot.name,
-                        description=bot.description or "",
-                        forward_config=ForwardConfig(
-                            target_url=bot.get_url(),
-                            api_key=bot.api_key or "",
-                            timeout=bot.timeout
-                        ),
-                        enabled=bot.enabled
-                    )
-
-            # 2. 尝试获取默认 bot
-            if self.default_bot_key:
-                default_bot = await bot_repo.get_by_bot_key(self.default_bot_key)
-                if default_bot and default_bot.enabled:
-                    return BotConfig(
-                        bot_key=default_bot.bot_key,
-                        name=default_bot.name,
-                        description=default_bot.description or "",
-                        forward_config=ForwardConfig(
-                            target_url=default_bot.get_url(),
-                            api_key=default_bot.api_key or "",
-                            timeout=default_bot.timeout
-                        ),
-                        enabled=default_bot.enabled
-                    )
-
-            return None
+        return None
 
     async def create_bot(self, data: dict) -> dict:
         """
@@ -698,20 +756,19 @@ class ConfigDB:
                 whitelist = data.get("whitelist", [])
                 blacklist = data.get("blacklist", [])
 
-                for chat_id in whitelist:
-                    await rule_repo.create(bot.id, chat_id, "whitelist",
-                                          remark=data.get("whitelist_remark", ""))
-
-                for chat_id in blacklist:
-                    await rule_repo.create(bot.id, chat_id, "blacklist",
-                                          remark=data.get("blacklist_remark", ""))
+                await rule_repo.bulk_create(bot.id, _access_rule_rows(
+                    whitelist,
+                    blacklist,
+                    whitelist_remark=data.get("whitelist_remark", ""),
+                    blacklist_remark=data.get("blacklist_remark", ""),
+                ))
 
                 await session.commit()
 
                 logger.info(f"创建 Bot 成功: {data['bot_key']}")
 
                 # 刷新内存缓存，确保新创建的 Bot 立即可用于消息路由
-                await self.reload_config()
+                await self._refresh_single(data["bot_key"])
 
                 # 返回创建的 Bot 详情（使用异步方法从数据库获取）
                 created_bot = await self.get_bot_detail(data["bot_key"])
@@ -772,18 +829,14 @@ class ConfigDB:
                     whitelist = data.get("whitelist", [])
                     blacklist = data.get("blacklist", [])
 
-                    for chat_id in whitelist:
-                        await rule_repo.create(bot.id, chat_id, "whitelist")
-
-                    for chat_id in blacklist:
-                        await rule_repo.create(bot.id, chat_id, "blacklist")
+                    await rule_repo.bulk_create(bot.id, _access_rule_rows(whitelist, blacklist))
 
                 await session.commit()
 
                 logger.info(f"更新 Bot 成功: {bot_key}")
 
-                # 重新加载配置到内存
-                await self.reload_config()
+                # 只刷新该 Bot 的内存配置
+                await self._refresh_single(bot_key)
 
                 # 返回更新后的 Bot 详情
                 updated_bot = await self.get_bot_detail(bot_key)
@@ -824,8 +877,8 @@ class ConfigDB:
 
                 logger.info(f"删除 Bot 成功: {bot_key}")
 
-                # 重新加载配置到内存
-                await self.reload_config()
+                # 从内存配置中移除
+                self.bots.pop(bot_key, None)
 
                 return {"success": True}
 
@@ -6,8 +6,10 @@
 
 配置：
 - 最大消息字节数设置为 2048 字节（2K）
-- 预留 150 字节用于头部和分页信息
+- split_and_format_message 按实际头部长度预留字节
+- 单独调用 split_message_content 时默认预留 150 字节用于头部和分页信息
 """
+import functools
 import logging
 from dataclasses import dataclass
 
@@ -23,7 +25,7 @@ HEADER_RESERVE_BYTES = 150
 EFFECTIVE_MAX_BYTES = MAX_MESSAGE_BYTES - HEADER_RESERVE_BYTES
 
 
-@dataclass
+@dataclass(slots=True)
 class SplitMessage:
     """分拆后的消息"""
     content: str
@@ -34,8 +36,9 @@ class SplitMessage:
 
 
 def get_string_bytes(s: str) -> int:
-    """获取字符串的 UTF-8 字节数"""
-    return len(s.encode('utf-8'))
+    """获取字符串的 UTF-8 字节数（纯 ASCII 字符串直接取长度，不编码）"""
+    # CPython 中 str.isascii() 是 O(1) 的标志位检查
+    return len(s) if s.isascii() else len(s.encode('utf-8'))
 
 
 def split_message_content(
@@ -48,6 +51,8 @@ def split_message_content(
     尽量在换行符处分拆，避免在中间断开。
     如果单行超过限制，则强制按字符分拆。
     
+    整条消息只编码一次，后续都在字节偏移上计算，每段只在输出时解码一次。
+    
     Args:
         message: 原始消息内容
         max_bytes: 每段最大字节数
@@ -58,92 +63,101 @@ def split_message_content(
     if not message:
         return [""]
     
+    data = message.encode('utf-8')
+    
     # 如果消息不超过限制，直接返回
-    if get_string_bytes(message) <= max_bytes:
+    if len(data) <= max_bytes:
         return [message]
     
+    return _split_encoded(data, max_bytes)
+
+
+def _split_encoded(data: bytes, max_bytes: int) -> list[str]:
+    """
+    在已编码的 UTF-8 字节串上按行分拆，返回解码后的各段
+    
+    相邻行在原文中是连续的，按行累积的一段就是原字节串的一个切片。
+    """
+    total = len(data)
     parts = []
-    lines = message.split('\n')
-    current_part = []
-    current_bytes = 0
+    # 当前累积部分的字节范围 [part_start, part_end)，part_start < 0 表示尚无累积内容
+    part_start = -1
+    part_end = 0
+    pos = 0
     
-    for line in lines:
-        line_bytes = get_string_bytes(line)
-        newline_bytes = 1  # '\n' 占 1 字节
-        
-        # 如果当前行本身超过限制，需要强制分拆
-        if line_bytes > max_bytes:
-            # 先保存当前累积的内容
-            if current_part:
-                parts.append('\n'.join(current_part))
-                current_part = []
-                current_bytes = 0
-            
-            # 按字符分拆超长行
-            split_lines = _split_long_line(line, max_bytes)
-            for i, split_line in enumerate(split_lines):
-                if i < len(split_lines) - 1:
-                    parts.append(split_line)
-                else:
-                    # 最后一段加入当前累积
-                    current_part.append(split_line)
-                    current_bytes = get_string_bytes(split_line)
-            continue
+    while pos <= total:
+        line_end = data.find(b'\n', pos)
+        if line_end == -1:
+            line_end = total
         
-        # 检查添加这行后是否超过限制
-        additional_bytes = line_bytes + (newline_bytes if current_part else 0)
-        
-        if current_bytes + additional_bytes > max_bytes:
-            # 超过限制，保存当前部分，开始新的部分
-            if current_part:
-                parts.append('\n'.join(current_part))
-            current_part = [line]
-            current_bytes = line_bytes
+        if line_end - pos > max_bytes:
+            # 当前行本身超过限制，先保存当前累积的内容，再按字符分拆超长行
+            if part_start >= 0:
+                parts.append(data[part_start:part_end].decode('utf-8'))
+            ranges = _utf8_cut_ranges(data, pos, line_end, max_bytes)
+            for cut_start, cut_end in ranges[:-1]:
+                parts.append(data[cut_start:cut_end].decode('utf-8'))
+            # 最后一段加入当前累积
+            part_start, part_end = ranges[-1]
+        elif part_start < 0:
+            part_start, part_end = pos, line_end
+        elif line_end - part_start > max_bytes:
+            # 加上这行 (含前面的 '\n') 后超过限制，保存当前部分，开始新的部分
+            parts.append(data[part_start:part_end].decode('utf-8'))
+            part_start, part_end = pos, line_end
         else:
             # 未超过限制，继续累积
-            current_part.append(line)
-            current_bytes += additional_bytes
+            part_end = line_end
+        
+        pos = line_end + 1
     
     # 保存最后一部分
-    if current_part:
-        parts.append('\n'.join(current_part))
+    parts.append(data[part_start:part_end].decode('utf-8'))
     
     return parts
 
 
+def _utf8_cut_ranges(data: bytes, start: int, stop: int, max_bytes: int) -> list[tuple[int, int]]:
+    """
+    将 data[start:stop] 按 max_bytes 切成若干字节范围
+    
+    切点回退到字符起始字节处（不在多字节字符中间断开）；
+    max_bytes 小于单个字符的字节数时，该字符单独成段
+    """
+    ranges = []
+    
+    while start < stop:
+        end = start + max_bytes
+        if end >= stop:
+            end = stop
+        else:
+            # 0b10xxxxxx 为 UTF-8 续字节，回退到字符边界
+            while end > start and (data[end] & 0xC0) == 0x80:
+                end -= 1
+            if end == start:
+                end = start + 1
+                while end < stop and (data[end] & 0xC0) == 0x80:
+                    end += 1
+        ranges.append((start, end))
+        start = end
+    
+    return ranges
+
+
 def _split_long_line(line: str, max_bytes: int) -> list[str]:
     """
     分拆超长的单行
     
-    按字符分拆，确保每段不超过 max_bytes
+    整行只编码一次，按字节范围切分后逐段解码，确保每段不超过 max_bytes
     """
     if not line:
         return [""]
     
-    parts = []
-    current_chars = []
-    current_bytes = 0
-    
-    for char in line:
-        char_bytes = get_string_bytes(char)
-        
-        if current_bytes + char_bytes > max_bytes:
-            # 超过限制，保存当前部分
-            if current_chars:
-                parts.append(''.join(current_chars))
-            current_chars = [char]
-            current_bytes = char_bytes
-        else:
-            current_chars.append(char)
-            current_bytes += char_bytes
-    
-    # 保存最后一部分
-    if current_chars:
-        parts.append(''.join(current_chars))
-    
-    return parts
+    data = line.encode('utf-8')
+    return [data[a:b].decode('utf-8') for a, b in _utf8_cut_ranges(data, 0, len(data), max_bytes)]
 
 
+@functools.lru_cache(maxsize=4096)
 def create_message_header(
     short_id: str,
     project_name: str | None,
@@ -154,27 +168,24 @@ def create_message_header(
     创建消息头部
     
     格式: [#short_id 项目名] (1/3)
+    
+    同一会话的多条消息/多个分段会重复生成相同头部，结果按参数缓存
     """
     if not short_id:
         return ""
     
-    if project_name:
-        base_header = f"[#{short_id} {project_name}]"
-    else:
-        base_header = f"[#{short_id}]"
-    
-    # 只有多条消息时才显示分页信息
-    if total_parts > 1:
-        return f"{base_header} ({part_number}/{total_parts})"
-    
-    return base_header
+    # 单个 f-string 一次拼出完整头部；只有多条消息时才显示分页信息
+    return (
+        f"[#{short_id}{f' {project_name}' if project_name else ''}]"
+        f"{f' ({part_number}/{total_parts})' if total_parts > 1 else ''}"
+    )
 
 
 def split_and_format_message(
     message: str,
     short_id: str,
     project_name: str | None = None,
-    max_bytes: int = EFFECTIVE_MAX_BYTES
+    max_bytes: int | None = None
 ) -> list[SplitMessage]:
     """
     分拆消息并格式化
@@ -186,40 +197,123 @@ def split_and_format_message(
         message: 原始消息内容
         short_id: 会话短 ID
         project_name: 项目名称
-        max_bytes: 每段最大字节数
+        max_bytes: 每段内容的最大字节数，None 表示按实际头部长度从 MAX_MESSAGE_BYTES 中扣除
         
     Returns:
         分拆后的 SplitMessage 列表
     """
+    return _to_split_messages(
+        _split_and_format(message, message.encode('utf-8'), short_id, project_name, max_bytes)
+    )
+
+
+def split_and_format_message_contents(
+    message: str,
+    short_id: str,
+    project_name: str | None = None,
+    max_bytes: int | None = None
+) -> list[str]:
+    """
+    分拆并格式化消息，只返回各段内容（调用方只需要逐条发送时使用，不创建 SplitMessage）
+    
+    参数同 split_and_format_message，返回值为对应 SplitMessage.content 的列表。
+    """
+    return _split_and_format(message, message.encode('utf-8'), short_id, project_name, max_bytes)
+
+
+def split_and_format_message_bytes(
+    message_bytes: bytes,
+    short_id: str,
+    project_name: str | None = None,
+    max_bytes: int | None = None
+) -> list[SplitMessage]:
+    """
+    分拆并格式化已编码为 UTF-8 的消息（调用方已持有 bytes 时避免再次编码）
+    
+    参数和返回值同 split_and_format_message。
+    """
+    return _to_split_messages(
+        _split_and_format(None, message_bytes, short_id, project_name, max_bytes)
+    )
+
+
+def _split_and_format(
+    message: str | None,
+    data: bytes,
+    short_id: str,
+    project_name: str | None,
+    max_bytes: int | None
+) -> list[str]:
+    """
+    分拆并添加头部，返回各段格式化后的内容，全程只使用同一份编码结果
+    
+    message 为原文（可为 None），不需要分拆时直接使用，省去一次解码
+    """
     # 1. 先按内容分拆
-    content_parts = split_message_content(message, max_bytes)
+    if max_bytes is None:
+        content_parts = _split_for_header(message, data, short_id, project_name)
+    elif len(data) <= max_bytes:
+        content_parts = [message if message is not None else data.decode('utf-8')]
+    else:
+        content_parts = _split_encoded(data, max_bytes)
     total_parts = len(content_parts)
     
-    # 2. 为每部分添加头部和格式
-    result = []
-    for i, content in enumerate(content_parts):
-        part_number = i + 1
-        is_first = (i == 0)
-        is_last = (i == len(content_parts) - 1)
-        
-        # 创建头部
-        header = create_message_header(short_id, project_name, part_number, total_parts)
-        
-        # 组装消息
-        if header:
-            formatted_content = f"{header}\n{content}"
-        else:
-            formatted_content = content
-        
-        result.append(SplitMessage(
-            content=formatted_content,
-            part_number=part_number,
+    # 2. 为每部分添加头部
+    # 头部的 [#short_id 项目名] 部分各段相同，只生成一次，循环内只拼接分页信息
+    base_header = create_message_header(short_id, project_name, 1, 1)
+    if not base_header:
+        return content_parts
+    if total_parts == 1:
+        return [f"{base_header}\n{content_parts[0]}"]
+    return [
+        f"{base_header} ({part_number}/{total_parts})\n{content}"
+        for part_number, content in enumerate(content_parts, 1)
+    ]
+
+
+def _to_split_messages(contents: list[str]) -> list[SplitMessage]:
+    """为格式化后的各段补充分页信息"""
+    total_parts = len(contents)
+    return [
+        SplitMessage(
+            content=content,
+            part_number=i + 1,
             total_parts=total_parts,
-            is_first=is_first,
-            is_last=is_last
-        ))
+            is_first=(i == 0),
+            is_last=(i == total_parts - 1)
+        )
+        for i, content in enumerate(contents)
+    ]
+
+
+def _header_reserve_bytes(short_id: str, project_name: str | None, part_number: int, total_parts: int) -> int:
+    """头部及其后换行符占用的字节数（没有头部时为 0）"""
+    header = create_message_header(short_id, project_name, part_number, total_parts)
+    return get_string_bytes(header) + 1 if header else 0
+
+
+def _split_for_header(
+    message: str | None,
+    data: bytes,
+    short_id: str,
+    project_name: str | None
+) -> list[str]:
+    """
+    按实际头部长度分拆内容，使 头部 + 内容 不超过 MAX_MESSAGE_BYTES
+    
+    分页信息 (i/N) 的长度取决于总段数：先按 9 段的位数预留，
+    分拆结果超过该段数时按更多位数重新分拆
+    """
+    if _header_reserve_bytes(short_id, project_name, 1, 1) + len(data) <= MAX_MESSAGE_BYTES:
+        return [message if message is not None else data.decode('utf-8')]
     
-    return result
+    total_guess = 9
+    while True:
+        reserve = _header_reserve_bytes(short_id, project_name, total_guess, total_guess)
+        content_parts = _split_encoded(data, MAX_MESSAGE_BYTES - reserve)
+        if len(content_parts) <= total_guess:
+            return content_parts
+        total_guess = total_guess * 10 + 9
 
 
 def needs_split(message: str, short_id: str, project_name: str | None = None) -> bool:
@@ -228,9 +322,7 @@ def needs_split(message: str, short_id: str, project_name: str | None = None) ->
     
     考虑头部的开销后判断。
     """
-    # 计算完整格式化后的消息长度
-    header = create_message_header(short_id, project_name, 1, 1)
-    
-    full_message = f"{header}\n{message}" if header else message
+    # 按长度相加计算完整格式化后的消息字节数，不拼接整条消息
+    header_bytes = _header_reserve_bytes(short_id, project_name, 1, 1)
     
-    return get_string_bytes(full_message) > MAX_MESSAGE_BYTES
+    return header_bytes + get_string_bytes(message) > MAX_MESSAGE_BYTES
@@ -18,9 +18,9 @@ except ImportError:
     from typing_extensions import Literal
 from sqlalchemy import (
     String, Boolean, Integer, Text, DateTime, ForeignKey,
-    Index, UniqueConstraint
+    Index, UniqueConstraint, event
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, reconstructor, relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 
 
@@ -225,9 +225,27 @@ class Chatbot(Base):
         Index("idx_chatbots_platform", "platform"),
     )
 
+    # 黑白名单索引 (whitelist_ids, blacklist_ids)，首次 check_access 时构建；
+    # access_rules 变更、对象 refresh/expire 时置空，下次访问重新构建
+    _access_index = None
+
     def __repr__(self) -> str:
         return f"<Chatbot(id={self.id}, bot_key={self.bot_key[:10]}..., name={self.name}, platform={self.platform})>"
 
+    @reconstructor
+    def _reset_access_index(self) -> None:
+        """从数据库加载时清空黑白名单索引"""
+        self._access_index = None
+
+    def _build_access_index(self) -> tuple[frozenset, frozenset]:
+        """按规则类型把 access_rules 的 chat_id 收集为集合"""
+        rules = self.access_rules
+        self._access_index = (
+            frozenset(r.chat_id for r in rules if r.rule_type == "whitelist"),
+            frozenset(r.chat_id for r in rules if r.rule_type == "blacklist"),
+        )
+        return self._access_index
+
     # ============== Platform Config Helpers ==============
 
     def get_platform_config(self) -> dict:
@@ -286,7 +304,7 @@ class Chatbot(Base):
         检查用户是否有权限访问此 Bot
 
         注意: 此方法假设 access_rules 已经预加载 (使用 selectin loading)
-        如果没有预加载,应该在查询时使用 options(selectinload(Chatbot.access_rules))
+        如果没有预加载,应该在查询时使用 options(repository.ACCESS_RULES_LOADER)
 
         Args:
             user_id: 用户 ID
@@ -302,16 +320,16 @@ class Chatbot(Base):
 
         elif self.access_mode == "whitelist":
             # 检查白名单
-            for rule in self.access_rules:
-                if rule.rule_type == "whitelist" and rule.chat_id == user_id:
-                    return True, ""
+            whitelist_ids = (self._access_index or self._build_access_index())[0]
+            if user_id in whitelist_ids:
+                return True, ""
             return False, "抱歉，您还没有权限访问此 Bot，如有意向，请联系作者。"
 
         elif self.access_mode == "blacklist":
             # 检查黑名单
-            for rule in self.access_rules:
-                if rule.rule_type == "blacklist" and rule.chat_id == user_id:
-                    return False, "抱歉，您还没有权限访问此 Bot，如有意向，请联系作者。"
+            blacklist_ids = (self._access_index or self._build_access_index())[1]
+            if user_id in blacklist_ids:
+                return False, "抱歉，您还没有权限访问此 Bot，如有意向，请联系作者。"
             return True, ""
 
         return False, "未知的访问控制模式"
@@ -713,6 +731,32 @@ class ChatAccessRule(Base):
         }
 
 
+# ============== 黑白名单索引失效 ==============
+
+@event.listens_for(Chatbot.access_rules, "append")
+@event.listens_for(Chatbot.access_rules, "remove")
+@event.listens_for(Chatbot.access_rules, "bulk_replace")
+def _on_access_rules_changed(target: Chatbot, *args) -> None:
+    """access_rules 集合增删/整体替换时清空索引"""
+    target._access_index = None
+
+
+@event.listens_for(Chatbot, "refresh")
+@event.listens_for(Chatbot, "expire")
+def _on_chatbot_reloaded(target: Chatbot, *args) -> None:
+    """Bot 被 refresh/expire 时 access_rules 可能已重新加载，清空索引"""
+    target._access_index = None
+
+
+@event.listens_for(ChatAccessRule.chat_id, "set")
+@event.listens_for(ChatAccessRule.rule_type, "set")
+def _on_access_rule_modified(target: ChatAccessRule, *args) -> None:
+    """规则内容被修改时清空所属 Bot 的索引 (仅在关系已加载时，避免触发懒加载)"""
+    chatbot = target.__dict__.get("chatbot")
+    if chatbot is not None:
+        chatbot._access_index = None
+
+
 # ============== 异步 Agent 任务模型 ==============
 
 class AsyncAgentTask(Base):
@@ -1151,9 +1195,10 @@ class ChatInfo(Base):
     )
     
     # 索引
+    # chat_id 的唯一索引 (ix_chat_info_chat_id) 已覆盖等值查询，不再单独建索引
+    # (chat_type, last_seen_at) 复合索引服务"按类型取最近活跃"查询
     __table_args__ = (
-        Index("idx_chat_info_chat_id", "chat_id"),
-        Index("idx_chat_info_chat_type", "chat_type"),
+        Index("idx_chat_info_type_last_seen", "chat_type", "last_seen_at"),
         Index("idx_chat_info_last_seen", "last_seen_at"),
     )
     
@@ -5,9 +5,10 @@ Forward Service 数据库访问层 (Repository/DAO)
 """
 import logging
 from datetime import datetime, timezone
-from typing import Optional, List
-from sqlalchemy import select, update, delete, func
+from typing import Iterable, Optional, List
+from sqlalchemy import select, insert, update, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
 
 from .models import (
     Chatbot,
@@ -27,6 +28,15 @@ logger = logging.getLogger(__name__)
 # Sentinel value to distinguish "not provided" from None
 _UNSET = object()
 
+# 预加载访问规则：一条 IN 查询批量加载，只取访问控制用到的 chat_id / rule_type，
+# 访问其余列 (remark、created_at) 直接抛错，而不是逐行补查
+ACCESS_RULES_LOADER = selectinload(Chatbot.access_rules).load_only(
+    ChatAccessRule.chat_id, ChatAccessRule.rule_type, raiseload=True
+)
+
+# 不需要访问规则时覆盖关系默认的 selectin 加载，意外访问 access_rules 直接抛错
+NO_ACCESS_RULES = raiseload(Chatbot.access_rules)
+
 
 # ============== Chatbot Repository ==============
 
@@ -114,6 +124,25 @@ class ChatbotRepository:
         logger.info(f"创建 Bot: {bot_key} ({name})")
         return bot
 
+    async def bulk_create(self, rows: List[dict]) -> int:
+        """
+        批量创建 Bot (executemany INSERT，未提供的列使用模型默认值)
+
+        Args:
+            rows: 列名 -> 值 的字典列表，必须包含 bot_key
+
+        Returns:
+            创建的 Bot 数量
+        """
+        if not rows:
+            return 0
+
+        await self.session.execute(insert(Chatbot), rows)
+        await self.session.flush()
+
+        logger.info(f"批量创建 Bot: count={len(rows)}")
+        return len(rows)
+
     async def get_by_id(self, bot_id: int) -> Optional[Chatbot]:
         """
         根据 ID 获取 Bot
@@ -124,21 +153,28 @@ class ChatbotRepository:
         Returns:
             Chatbot 对象或 None
         """
-        stmt = select(Chatbot).where(Chatbot.id == bot_id)
+        stmt = select(Chatbot).where(Chatbot.id == bot_id).options(NO_ACCESS_RULES)
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def get_by_bot_key(self, bot_key: str) -> Optional[Chatbot]:
+    async def get_by_bot_key(
+        self,
+        bot_key: str,
+        include_rules: bool = False
+    ) -> Optional[Chatbot]:
         """
         根据 bot_key 获取 Bot
 
         Args:
             bot_key: Bot Key
+            include_rules: 是否预加载访问规则
 
         Returns:
             Chatbot 对象或 None
         """
-        stmt = select(Chatbot).where(Chatbot.bot_key == bot_key)
+        stmt = select(Chatbot).where(Chatbot.bot_key == bot_key).options(
+            ACCESS_RULES_LOADER if include_rules else NO_ACCESS_RULES
+        )
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
@@ -162,6 +198,9 @@ class ChatbotRepository:
         if enabled_only:
             stmt = stmt.where(Chatbot.enabled == True)
 
+        # 所有 Bot 的规则用一条 IN 查询批量加载
+        stmt = stmt.options(ACCESS_RULES_LOADER if include_rules else NO_ACCESS_RULES)
+
         # 按 ID 排序
         stmt = stmt.order_by(Chatbot.id)
 
@@ -258,6 +297,25 @@ class ChatbotRepository:
         logger.info(f"更新 Bot: id={bot_id}, fields={list(update_data.keys())}")
         return await self.get_by_id(bot_id)
 
+    async def bulk_update(self, rows: List[dict]) -> int:
+        """
+        按主键批量更新 Bot (executemany UPDATE，只更新字典中给出的列)
+
+        Args:
+            rows: 列名 -> 值 的字典列表，必须包含 id
+
+        Returns:
+            更新的 Bot 数量
+        """
+        if not rows:
+            return 0
+
+        await self.session.execute(update(Chatbot), rows)
+        await self.session.flush()
+
+        logger.info(f"批量更新 Bot: count={len(rows)}")
+        return len(rows)
+
     async def delete(self, bot_id: int) -> bool:
         """
         删除 Bot
@@ -281,6 +339,43 @@ class ChatbotRepository:
         logger.info(f"删除 Bot: id={bot_id}, bot_key={bot.bot_key}")
         return True
 
+    async def get_id_map(self) -> dict[str, int]:
+        """
+        获取所有 Bot 的 bot_key -> id 映射 (只查询两列，不加载模型和访问规则)
+
+        Returns:
+            {bot_key: id}
+        """
+        result = await self.session.execute(select(Chatbot.bot_key, Chatbot.id))
+        return dict(result.all())
+
+    async def delete_by_bot_keys(self, bot_keys: Iterable[str]) -> int:
+        """
+        批量删除 Bot 及其访问规则
+
+        Args:
+            bot_keys: 要删除的 Bot Key
+
+        Returns:
+            删除的 Bot 数量
+        """
+        bot_keys = list(bot_keys)
+        if not bot_keys:
+            return 0
+
+        # 显式删除规则，不依赖数据库的外键级联 (SQLite 默认不启用)
+        bot_ids = select(Chatbot.id).where(Chatbot.bot_key.in_(bot_keys))
+        await self.session.execute(
+            delete(ChatAccessRule).where(ChatAccessRule.chatbot_id.in_(bot_ids))
+        )
+        result = await self.session.execute(
+            delete(Chatbot).where(Chatbot.bot_key.in_(bot_keys))
+        )
+        await self.session.flush()
+
+        logger.info(f"批量删除 Bot: bot_keys={bot_keys}, count={result.rowcount}")
+        return result.rowcount
+
     async def count(self, enabled_only: bool = False) -> int:
         """
         统计 Bot 数量
@@ -349,6 +444,67 @@ class ChatAccessRuleRepository:
         logger.info(f"创建访问规则: chatbot_id={chatbot_id}, chat_id={chat_id}, type={rule_type}")
         return rule
 
+    async def bulk_create(
+        self,
+        chatbot_id: int,
+        rules: List[tuple[str, str, str]]
+    ) -> int:
+        """
+        批量创建访问规则 (一条 INSERT 语句)
+
+        Args:
+            chatbot_id: Bot ID
+            rules: (chat_id, rule_type, remark) 列表
+
+        Returns:
+            创建的规则数量
+        """
+        if not rules:
+            return 0
+
+        await self.session.execute(
+            insert(ChatAccessRule),
+            [
+                {"chatbot_id": chatbot_id, "chat_id": chat_id, "rule_type": rule_type, "remark": remark}
+                for chat_id, rule_type, remark in rules
+            ]
+        )
+        await self.session.flush()
+
+        logger.info(f"批量创建访问规则: chatbot_id={chatbot_id}, count={len(rules)}")
+        return len(rules)
+
+    async def replace_for_chatbots(
+        self,
+        rules_by_chatbot: dict[int, List[tuple[str, str, str]]]
+    ) -> int:
+        """
+        替换多个 Bot 的访问规则 (一条 DELETE + 一条 executemany INSERT)
+
+        Args:
+            rules_by_chatbot: {chatbot_id: [(chat_id, rule_type, remark), ...]}
+
+        Returns:
+            创建的规则数量
+        """
+        if not rules_by_chatbot:
+            return 0
+
+        await self.session.execute(
+            delete(ChatAccessRule).where(ChatAccessRule.chatbot_id.in_(list(rules_by_chatbot)))
+        )
+        rows = [
+            {"chatbot_id": chatbot_id, "chat_id": chat_id, "rule_type": rule_type, "remark": remark}
+            for chatbot_id, rules in rules_by_chatbot.items()
+            for chat_id, rule_type, remark in rules
+        ]
+        if rows:
+            await self.session.execute(insert(ChatAccessRule), rows)
+        await self.session.flush()
+
+        logger.info(f"替换访问规则: chatbots={len(rules_by_chatbot)}, count={len(rows)}")
+        return len(rows)
+
     async def get_by_id(self, rule_id: int) -> Optional[ChatAccessRule]:
         """
         根据 ID 获取规则
@@ -426,6 +582,24 @@ class ChatAccessRuleRepository:
         result = await self.session.execute(stmt)
         return list(result.scalars().all())
 
+    async def count_by_chatbot(self) -> dict[int, dict[str, int]]:
+        """
+        统计所有 Bot 的规则数量 (一条 GROUP BY 查询)
+
+        Returns:
+            {chatbot_id: {rule_type: count}}，没有规则的 Bot 不出现在结果中
+        """
+        stmt = (
+            select(ChatAccessRule.chatbot_id, ChatAccessRule.rule_type, func.count())
+            .group_by(ChatAccessRule.chatbot_id, ChatAccessRule.rule_type)
+        )
+        result = await self.session.execute(stmt)
+
+        counts: dict[int, dict[str, int]] = {}
+        for chatbot_id, rule_type, count in result:
+            counts.setdefault(chatbot_id, {})[rule_type] = count
+        return counts
+
     async def delete(self, rule_id: int) -> bool:
         """
         删除规则
@@ -98,12 +98,7 @@ async def start_discord_bot(bot_key: str):
         logger.error(f"未找到 Discord Bot 配置: {bot_key}")
         return
 
-    # 通过 _bot（Chatbot 数据库模型）获取平台特定配置
-    if not bot_config._bot:
-        logger.error(f"Discord Bot 配置缺少底层数据库模型: {bot_key}")
-        return
-
-    platform_config = bot_config._bot.get_platform_config()
+    platform_config = bot_config.get_platform_config()
     bot_token = platform_config.get("bot_token")
 
     if not bot_token:
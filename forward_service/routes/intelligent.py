@@ -28,7 +28,7 @@ async def handle_intelligent_message(
     bot_key: str,
     message_data: dict,
     client: WeComIntelligentClient
-) -> str:
+) -> str | bytes:
     """
     处理智能机器人消息
     
@@ -38,7 +38,7 @@ async def handle_intelligent_message(
         client: 智能机器人客户端
     
     Returns:
-        XML 响应
+        XML 响应（流式回复为已编码的字节）
     """
     from_user = message_data.get("FromUserName", "")
     to_user = message_data.get("ToUserName", "")
@@ -136,7 +136,7 @@ async def handle_intelligent_message(
         
         # 返回流式消息 XML
         # TODO: 支持真正的流式响应
-        return client.build_stream_xml(
+        return client.build_stream_xml_bytes(
             to_user=from_user,
             from_user=to_user,
             stream_id=stream_id,
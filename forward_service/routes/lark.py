@@ -14,7 +14,7 @@ from typing import Optional
 from fastapi import APIRouter, Request, Response
 from fastapi.responses import JSONResponse
 
-from ..clients.lark import LarkClient
+from ..clients.lark import LarkClient, get_lark_client
 from ..config import config
 from ..services.forwarder import forward_to_agent_with_user_project
 from ..session_manager import get_session_manager
@@ -41,20 +41,20 @@ async def handle_lark_message(
     parsed = client.parse_event(event)
     
     # 只处理文本消息
-    event_type = parsed.get("event_type")
+    event_type = parsed.event_type
     if event_type != "im.message.receive_v1":
         logger.debug(f"忽略非消息事件: {event_type}")
         return
     
-    message_type = parsed.get("message_type")
+    message_type = parsed.message_type
     if message_type != "text":
         logger.debug(f"忽略非文本消息: {message_type}")
         return
     
-    chat_id = parsed["chat_id"]
-    user_id = parsed["user_id"] or parsed["open_id"]
-    text = parsed["text"]
-    message_id = parsed["message_id"]
+    chat_id = parsed.chat_id
+    user_id = parsed.user_id or parsed.open_id
+    text = parsed.text
+    message_id = parsed.message_id
     
     if not text or not user_id:
         logger.debug(f"消息缺少必要字段: {parsed}")
@@ -265,8 +265,8 @@ async def lark_callback(bot_key: str, request: Request) -> Response:
                 content={"error": "App credentials not configured"}
             )
         
-        # 创建客户端
-        client = LarkClient(
+        # 获取客户端（按 app_id 复用，共享 token 缓存）
+        client = get_lark_client(
             app_id=app_id,
             app_secret=app_secret,
             encrypt_key=encrypt_key,
@@ -92,11 +92,7 @@ async def start_qqbot(bot_key: str):
         logger.error(f"未找到 QQ Bot 配置: {bot_key}")
         return
 
-    if not bot_config._bot:
-        logger.error(f"QQ Bot 配置缺少底层数据库模型: {bot_key}")
-        return
-
-    platform_config = bot_config._bot.get_platform_config()
+    platform_config = bot_config.get_platform_config()
     app_id = platform_config.get("app_id", "")
     client_secret = platform_config.get("client_secret", "")
 
@@ -134,7 +130,7 @@ async def start_qqbot_endpoint(bot_key: str):
     bot_cfg = config.get_bot_or_default(bot_key)
     if not bot_cfg:
         return {"success": False, "error": f"Bot '{bot_key}' 不存在"}
-    if not bot_cfg._bot or bot_cfg._bot.platform != "qqbot":
+    if bot_cfg.platform != "qqbot":
         return {"success": False, "error": f"Bot '{bot_key}' 不是 QQ Bot 平台"}
 
     if bot_key in qqbot_clients:
@@ -16,7 +16,7 @@ from typing import Optional
 from fastapi import APIRouter, Request, Header, HTTPException, BackgroundTasks
 
 from ..config import config
-from ..clients.slack import SlackClient
+from ..clients.slack import SlackClient, get_slack_client
 from ..services.forwarder import forward_to_agent_with_user_project, AgentResult
 from ..database import get_db_manager
 from ..session_manager import get_session_manager
@@ -258,7 +258,7 @@ async def handle_message_event(bot, bot_token: str, event: dict):
         bot_token: Slack Bot Token
         event: 事件数据
     """
-    slack_client = SlackClient(bot_token)
+    slack_client = get_slack_client(bot_token)
     
     channel = event.get("channel")
     user = event.get("user")
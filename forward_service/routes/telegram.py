@@ -13,7 +13,7 @@ from typing import Optional
 from fastapi import APIRouter, Request, Response, Header
 from fastapi.responses import JSONResponse
 
-from ..clients.telegram import TelegramClient
+from ..clients.telegram import TelegramClient, get_telegram_client
 from ..config import config
 from ..services.forwarder import forward_to_agent_with_user_project
 from ..session_manager import get_session_manager
@@ -39,14 +39,14 @@ async def handle_telegram_message(
     # 解析消息
     parsed = client.parse_update(update)
     
-    if not parsed.get("text"):
+    if not parsed.text:
         logger.debug(f"忽略非文本消息: {update}")
         return
     
-    chat_id = parsed["chat_id"]
-    user_id = parsed["user_id"]
-    text = parsed["text"]
-    message_id = parsed["message_id"]
+    chat_id = parsed.chat_id
+    user_id = parsed.user_id
+    text = parsed.text
+    message_id = parsed.message_id
     
     # 查找对应的 Bot 配置
     bot = config.get_bot_or_default(bot_key)
@@ -259,8 +259,8 @@ async def telegram_callback(
                 content={"error": "Bot token not configured"}
             )
         
-        # 创建客户端
-        client = TelegramClient(bot_token=bot_token, secret_token=secret_token)
+        # 获取客户端（按 bot_token 复用）
+        client = get_telegram_client(bot_token=bot_token, secret_token=secret_token)
         
         # 验证 Secret Token (如果配置了)
         if not client.verify_webhook(x_telegram_bot_api_secret_token):
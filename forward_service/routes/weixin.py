@@ -388,12 +388,10 @@ async def start_weixin(bot_key: str) -> dict[str, Any]:
     bot_config = config.get_bot_or_default(bot_key)
     if not bot_config:
         return {"success": False, "error": f"Bot '{bot_key}' 不存在"}
-    if not bot_config._bot:
-        return {"success": False, "error": f"Bot '{bot_key}' 缺少数据库记录"}
-    if bot_config._bot.platform != "weixin":
+    if bot_config.platform != "weixin":
         return {"success": False, "error": f"Bot '{bot_key}' 不是微信平台"}
 
-    platform_config = bot_config._bot.get_platform_config()
+    platform_config = bot_config.get_platform_config()
     bot_token = platform_config.get("bot_token", "")
     ilink_bot_id = platform_config.get("ilink_bot_id", "")
 
@@ -471,7 +469,7 @@ async def qr_login_endpoint(bot_key: str) -> dict[str, Any]:
     bot_config = config.get_bot_or_default(bot_key)
     if not bot_config:
         return {"success": False, "error": f"Bot '{bot_key}' 不存在"}
-    if not bot_config._bot or bot_config._bot.platform != "weixin":
+    if bot_config.platform != "weixin":
         return {"success": False, "error": f"Bot '{bot_key}' 不是微信平台"}
 
     client = WeixinClient()
@@ -19,7 +19,7 @@ if TYPE_CHECKING:
 from .config import config
 from .message_splitter import (
     create_message_header,
-    split_and_format_message,
+    split_and_format_message_contents,
     needs_split,
 )
 
@@ -201,18 +201,19 @@ async def _send_message_split(
     """
     try:
         # 分拆消息
-        split_messages = split_and_format_message(
+        contents = split_and_format_message_contents(
             message=message,
             short_id=short_id,
             project_name=project_name
         )
+        total_parts = len(contents)
         
-        logger.info(f"消息分拆为 {len(split_messages)} 条: chat_id={chat_id}")
+        logger.info(f"消息分拆为 {total_parts} 条: chat_id={chat_id}")
         
         # 逐条发送
-        for split_msg in split_messages:
+        for part_number, content in enumerate(contents, 1):
             result = send_to_wecom(
-                message=split_msg.content,
+                message=content,
                 chat_id=chat_id,
                 msg_type=msg_type,
                 bot_key=bot_key,
@@ -221,14 +222,14 @@ async def _send_message_split(
             
             # 检查发送结果
             if isinstance(result, dict) and result.get("errcode", 0) != 0:
-                logger.error(f"分拆消息发送失败: part={split_msg.part_number}/{split_msg.total_parts}, error={result.get('errmsg')}")
+                logger.error(f"分拆消息发送失败: part={part_number}/{total_parts}, error={result.get('errmsg')}")
                 return {
                     "success": False,
-                    "error": f"第 {split_msg.part_number}/{split_msg.total_parts} 条消息发送失败: {result.get('errmsg', '未知错误')}",
-                    "parts_sent": split_msg.part_number - 1
+                    "error": f"第 {part_number}/{total_parts} 条消息发送失败: {result.get('errmsg', '未知错误')}",
+                    "parts_sent": part_number - 1
                 }
         
-        return {"success": True, "parts_sent": len(split_messages)}
+        return {"success": True, "parts_sent": total_parts}
         
     except Exception as e:
         logger.error(f"分拆消息发送失败: {e}", exc_info=True)
@@ -236,7 +236,7 @@ async def forward_to_agent_with_bot(
     Returns:
         AgentResult 或 None
     """
-    # 获取 Bot 配置（从数据库实时读取，确保多进程一致性）
+    # 获取 Bot 配置（优先使用内存配置，内存中没有时回查数据库）
     bot = await config.get_bot_or_default_from_db(bot_key)
     if not bot:
         logger.warning(f"未找到 bot_key={bot_key} 的配置，且无默认 Bot")
@@ -0,0 +1,123 @@
+"""
+出站消息合并发送工具
+
+同一目标在极短时间窗口内的多条文本消息合并为一条发送，减少 API 请求次数：
+- 调用方通过 enqueue() 投递消息，不等待发送结果
+- 后台任务取到第一条消息后，在窗口期内继续收集（最多 max_batch 条）
+- 按目标分组、保持原顺序，用分隔符拼接后各发一次
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认合并窗口（秒）与单批最大消息数
+DEFAULT_BATCH_WINDOW = 0.005
+DEFAULT_MAX_BATCH = 32
+DEFAULT_SEPARATOR = "\n---\n"
+
+
+class MessageBatcher:
+    """按目标合并短时间内的出站文本消息"""
+
+    def __init__(
+        self,
+        send: Callable[[str, str], Awaitable[Any]],
+        window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        separator: str = DEFAULT_SEPARATOR,
+        max_chars: Optional[int] = None,
+    ):
+        """
+        Args:
+            send: 实际发送函数 send(target, text)
+            window: 合并窗口（秒）
+            max_batch: 单批最多收集的消息数
+            separator: 合并时的分隔符
+            max_chars: 合并后单条消息的最大长度（平台限制），None 表示不限制
+        """
+        self._send = send
+        self._window = window
+        self._max_batch = max_batch
+        self._separator = separator
+        self._max_chars = max_chars
+        self._queue: asyncio.Queue[Tuple[str, str]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def enqueue(self, target: str, text: str) -> None:
+        """投递一条消息（首次调用时启动后台发送任务）"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        await self._queue.put((target, text))
+
+    async def close(self) -> None:
+        """停止后台发送任务（未发送的消息会被丢弃）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _collect(self) -> List[Tuple[str, str]]:
+        """等待第一条消息，然后在窗口期内尽量多收集"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self._window
+
+        while len(batch) < self._max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    def _merge(self, texts: List[str]) -> List[str]:
+        """拼接同一目标的消息，超过 max_chars 时拆成多条"""
+        if self._max_chars is None:
+            return [self._separator.join(texts)]
+
+        merged: List[str] = []
+        current = texts[0]
+        for text in texts[1:]:
+            candidate = f"{current}{self._separator}{text}"
+            if len(candidate) > self._max_chars:
+                merged.append(current)
+                current = text
+            else:
+                current = candidate
+        merged.append(current)
+        return merged
+
+    async def _send_target(self, target: str, texts: List[str]) -> None:
+        """按顺序发送同一目标的合并消息"""
+        for text in self._merge(texts):
+            try:
+                await self._send(target, text)
+            except Exception as e:
+                logger.error(f"合并发送消息失败: target={target}, error={e}")
+
+    async def _run(self) -> None:
+        """后台发送循环：不同目标并发发送，同一目标保持顺序"""
+        while True:
+            batch = await self._collect()
+
+            grouped: Dict[str, List[str]] = {}
+            for target, text in batch:
+                grouped.setdefault(target, []).append(text)
+
+            await asyncio.gather(
+                *(self._send_target(target, texts) for target, texts in grouped.items())
+            )
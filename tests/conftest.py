@@ -121,6 +121,9 @@ async def mock_db_manager(test_db_engine):
                 except Exception:
                     await session.rollback()
                     raise
+
+        def get_session_readonly(self):
+            return self._session_factory()
     
     # 替换全局 db_manager
     test_manager = TestDatabaseManager(test_db_engine)
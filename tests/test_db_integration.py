@@ -5,11 +5,32 @@
 1. 使用数据库配置启动服务
 2. API 接口正常工作
 3. 配置更新功能
+4. 批量加载时的 SQL 语句数量
 """
+from contextlib import contextmanager
+
 import pytest
 import pytest_asyncio
+from sqlalchemy import event, select
 
 from forward_service.config import ConfigDB, BotConfig, ForwardConfig, AccessControl
+from forward_service.models import ChatAccessRule
+
+
+@contextmanager
+def count_statements(db_manager):
+    """统计代码块内执行的 SQL 语句"""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_manager.engine.sync_engine
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
 
 
 @pytest.mark.asyncio
@@ -112,3 +133,250 @@ async def test_config_dict_serialization():
     assert d["enabled"] == True
 
     print("✅ 配置序列化测试通过")
+
+
+@pytest.mark.asyncio
+async def test_load_bots_batches_access_rules(mock_db_manager):
+    """测试加载配置时访问规则批量加载，查询数量与 Bot 数量无关"""
+    from forward_service.repository import get_chatbot_repository, get_access_rule_repository
+
+    async with mock_db_manager.get_session() as session:
+        bot_repo = get_chatbot_repository(session)
+        rule_repo = get_access_rule_repository(session)
+        for i in range(5):
+            bot = await bot_repo.create(bot_key=f"bot_{i}", name=f"Bot {i}", access_mode="whitelist")
+            await rule_repo.create(bot.id, f"user_{i}", "whitelist")
+
+    config = ConfigDB()
+    with count_statements(mock_db_manager) as statements:
+        await config.initialize()
+
+    assert len(config.bots) == 5
+    assert config.bots["bot_3"].access_control.whitelist == ["user_3"]
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 2
+
+
+@pytest.mark.asyncio
+async def test_access_rules_loading_options(mock_db_manager):
+    """测试访问规则只加载必要列，不需要规则的查询不会加载规则"""
+    from sqlalchemy.exc import InvalidRequestError
+    from forward_service.repository import get_chatbot_repository, get_access_rule_repository
+
+    async with mock_db_manager.get_session() as session:
+        bot = await get_chatbot_repository(session).create(bot_key="bot", name="Bot", access_mode="whitelist")
+        await get_access_rule_repository(session).create(bot.id, "user1", "whitelist", remark="备注")
+
+    async with mock_db_manager.get_session_readonly() as session:
+        bot_repo = get_chatbot_repository(session)
+        with count_statements(mock_db_manager) as statements:
+            bot = await bot_repo.get_by_bot_key("bot", include_rules=True)
+
+        rule_select = statements[-1]
+        assert "chat_access_rules.chat_id" in rule_select
+        assert "remark" not in rule_select and "created_at" not in rule_select
+        assert bot.check_access("user1") == (True, "")
+        with pytest.raises(InvalidRequestError):
+            bot.access_rules[0].remark
+
+    async with mock_db_manager.get_session_readonly() as session:
+        with count_statements(mock_db_manager) as statements:
+            bots = await get_chatbot_repository(session).get_all()
+
+        assert len(statements) == 1
+        with pytest.raises(InvalidRequestError):
+            bots[0].access_rules
+
+
+@pytest.mark.asyncio
+async def test_create_and_update_bot_access_rules(mock_db_manager):
+    """测试创建/更新 Bot 时批量写入黑白名单"""
+    config = ConfigDB()
+    await config.initialize()
+
+    result = await config.create_bot({
+        "bot_key": "rules_bot",
+        "name": "Rules Bot",
+        "access_mode": "whitelist",
+        "whitelist": ["u1", "u2"],
+        "blacklist": ["bad"],
+        "whitelist_remark": "内部用户",
+    })
+    assert result["success"] is True
+    bot = result["bot"]
+    assert [(r["chat_id"], r["remark"]) for r in bot["whitelist"]] == [("u1", "内部用户"), ("u2", "内部用户")]
+    assert [r["chat_id"] for r in bot["blacklist"]] == ["bad"]
+    assert config.check_access(config.bots["rules_bot"], "u2")[0] is True
+
+    result = await config.update_bot("rules_bot", {"whitelist": ["u3"]})
+    assert result["success"] is True
+    assert [r["chat_id"] for r in result["bot"]["whitelist"]] == ["u3"]
+    assert result["bot"]["blacklist"] == []
+    assert config.check_access(config.bots["rules_bot"], "u2")[0] is False
+
+
+@pytest.mark.asyncio
+async def test_update_from_dict_replaces_bots(mock_db_manager):
+    """测试全量更新配置：删除、更新、新建 Bot"""
+    config = ConfigDB()
+    await config.initialize()
+    for key in ("keep", "drop1", "drop2"):
+        assert (await config.create_bot({"bot_key": key, "name": key, "whitelist": [f"{key}_user"]}))["success"]
+
+    result = await config.update_from_dict({
+        "default_bot_key": "keep",
+        "bots": {
+            "keep": {"name": "Kept", "access_control": {"mode": "whitelist", "whitelist": ["a"]}},
+            "new": {"name": "New", "forward_config": {"url_template": "https://new.example.com"}},
+        },
+    })
+
+    assert result["success"] is True
+    assert sorted(config.bots) == ["keep", "new"]
+    assert config.bots["keep"].name == "Kept"
+    assert config.bots["keep"].access_control.whitelist == ["a"]
+    assert config.bots["new"].forward_config.target_url == "https://new.example.com"
+    assert config.default_bot_key == "keep"
+
+    async with mock_db_manager.get_session() as session:
+        result = await session.execute(select(ChatAccessRule.chat_id).order_by(ChatAccessRule.chat_id))
+        assert list(result.scalars()) == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_update_from_dict_does_not_query_each_bot(mock_db_manager):
+    """测试全量更新时不再逐个按 bot_key 查询现有 Bot"""
+    config = ConfigDB()
+    await config.initialize()
+    bots = {f"bot_{i}": {"name": f"Bot {i}"} for i in range(5)}
+    await config.update_from_dict({"default_bot_key": "bot_0", "bots": bots})
+
+    with count_statements(mock_db_manager) as statements:
+        result = await config.update_from_dict({"default_bot_key": "bot_0", "bots": bots})
+
+    assert result["success"] is True
+    by_key_lookups = [
+        s for s in statements
+        if s.lstrip().upper().startswith("SELECT") and "chatbots.bot_key = " in s
+    ]
+    assert by_key_lookups == []
+
+
+@pytest.mark.asyncio
+async def test_update_from_dict_batches_writes(mock_db_manager):
+    """测试全量更新时 Bot 和规则的写入按批执行，语句数与 Bot 数量无关"""
+    config = ConfigDB()
+    await config.initialize()
+    old = {f"old_{i}": {"name": f"Old {i}"} for i in range(5)}
+    await config.update_from_dict({"default_bot_key": "old_0", "bots": old})
+
+    bots = {
+        **{key: {"name": "Updated", "access_control": {"whitelist": [key]}} for key in old},
+        **{f"new_{i}": {"name": f"New {i}", "access_control": {"blacklist": ["x"]}} for i in range(5)},
+    }
+    with count_statements(mock_db_manager) as statements:
+        result = await config.update_from_dict({"default_bot_key": "old_0", "bots": bots})
+
+    assert result["success"] is True
+    writes = [s.split("(")[0].split(" SET")[0].strip() for s in statements
+              if s.lstrip().upper().startswith(("INSERT", "UPDATE"))]
+    assert sorted(writes) == ["INSERT INTO chat_access_rules", "INSERT INTO chatbots", "UPDATE chatbots"]
+
+    assert len(config.bots) == 10
+    assert config.bots["old_3"].name == "Updated"
+    assert config.bots["old_3"].access_control.whitelist == ["old_3"]
+    assert config.bots["new_2"].access_control.blacklist == ["x"]
+
+
+@pytest.mark.asyncio
+async def test_list_bots_rule_counts(mock_db_manager):
+    """测试 Bot 列表中的规则数量统计"""
+    config = ConfigDB()
+    await config.initialize()
+    await config.create_bot({"bot_key": "a", "name": "A", "whitelist": ["u1", "u2"], "blacklist": ["x"]})
+    await config.create_bot({"bot_key": "b", "name": "B"})
+
+    bots = {b["bot_key"]: b for b in await config.list_bots()}
+
+    assert (bots["a"]["whitelist_count"], bots["a"]["blacklist_count"]) == (2, 1)
+    assert (bots["b"]["whitelist_count"], bots["b"]["blacklist_count"]) == (0, 0)
+    assert bots["b"]["async_config"] == {
+        "async_mode": False,
+        "processing_message": None,
+        "sync_timeout_seconds": 30,
+        "max_task_duration_seconds": 1800,
+    }
+    assert isinstance(bots["b"]["created_at"], str)
+
+
+@pytest.mark.asyncio
+async def test_crud_refreshes_only_affected_bot(mock_db_manager):
+    """测试单个 Bot 的增删改只刷新该 Bot 的内存配置"""
+    config = ConfigDB()
+    await config.initialize()
+    await config.create_bot({"bot_key": "a", "name": "A"})
+    await config.create_bot({"bot_key": "b", "name": "B"})
+    assert config.default_bot_key == "a"
+    bot_b = config.bots["b"]
+
+    await config.update_bot("a", {"name": "A2", "access_mode": "whitelist", "whitelist": ["u1"]})
+    assert config.bots["a"].name == "A2"
+    assert config.check_access(config.bots["a"], "u1")[0] is True
+    assert config.bots["b"] is bot_b
+
+    assert (await config.delete_bot("a"))["success"] is True
+    assert "a" not in config.bots
+    assert config.bots["b"] is bot_b
+
+
+@pytest.mark.asyncio
+async def test_reload_keeps_serving_old_bots_until_swap(mock_db_manager):
+    """测试重新加载期间读到的仍是完整的旧配置"""
+    from unittest.mock import patch
+    from forward_service.repository import ChatbotRepository
+
+    config = ConfigDB()
+    await config.initialize()
+    await config.create_bot({"bot_key": "a", "name": "A"})
+
+    seen_during_load = []
+    original_get_all = ChatbotRepository.get_all
+
+    async def spying_get_all(self, *args, **kwargs):
+        seen_during_load.append(config.get_bot("a"))
+        return await original_get_all(self, *args, **kwargs)
+
+    with patch.object(ChatbotRepository, "get_all", spying_get_all):
+        result = await config.reload_config()
+
+    assert result["success"] is True
+    assert seen_during_load and seen_during_load[0] is not None
+    assert config.get_bot("a") is not seen_during_load[0]
+
+
+@pytest.mark.asyncio
+async def test_get_bot_or_default_from_db_uses_memory(mock_db_manager):
+    """测试转发时优先读取内存配置，内存缺失时回查数据库"""
+    from forward_service.repository import get_chatbot_repository
+
+    config = ConfigDB()
+    await config.initialize()
+    await config.create_bot({"bot_key": "default", "name": "Default", "target_url": "https://d.example.com"})
+    await config.create_bot({"bot_key": "off", "name": "Off", "enabled": False})
+
+    with count_statements(mock_db_manager) as statements:
+        bot = await config.get_bot_or_default_from_db("default")
+        fallback = await config.get_bot_or_default_from_db("off")
+    assert bot is config.bots["default"]
+    assert fallback is bot
+    assert statements == []
+
+    # 其它进程新建的 Bot：内存中没有，回查数据库后加入内存
+    async with mock_db_manager.get_session() as session:
+        await get_chatbot_repository(session).create(bot_key="external", name="External")
+    external = await config.get_bot_or_default_from_db("external")
+    assert external.bot_key == "external"
+    assert config.bots["external"] is external
+
+    # 不存在的 Bot 回退到默认 Bot
+    assert await config.get_bot_or_default_from_db("missing") is bot
@@ -2,7 +2,7 @@
 企业微信智能机器人客户端单元测试
 
 测试内容:
-- XML 消息解析
+- XML 消息解析（单条、分块流式）
 - XML 响应构建（文本、流式、模板卡片）
 - ID 生成
 """
@@ -76,6 +76,42 @@ class TestWeComIntelligentClient:
         with pytest.raises(ValueError, match="Invalid XML"):
             self.client.parse_xml(invalid_xml)
     
+    def test_parse_xml_rejects_non_xml_root(self):
+        """测试非 <xml> 开头的输入在解析前被拒绝"""
+        for data in (b"GET / HTTP/1.1", b"<html></html>", b"<xmlfoo/>", b""):
+            with pytest.raises(ValueError, match="Invalid XML"):
+                self.client.parse_xml(data)
+    
+    def test_parse_xml_with_declaration(self):
+        """测试带 BOM 和 XML 声明的消息"""
+        xml_bytes = (
+            b'\xef\xbb\xbf<?xml version="1.0" encoding="UTF-8"?>\n'
+            b"<xml><MsgType><![CDATA[text]]></MsgType><Content><![CDATA[hi]]></Content></xml>"
+        )
+        
+        assert self.client.parse_xml(xml_bytes)["Content"] == "hi"
+    
+    def test_parse_xml_stream(self):
+        """测试从分块数据中连续解析多条消息"""
+        data = (
+            "<xml><MsgType><![CDATA[text]]></MsgType><Content><![CDATA[你好]]></Content></xml>\n"
+            "<xml><MsgType><![CDATA[event]]></MsgType><Event><![CDATA[enter_chat]]></Event></xml>"
+        ).encode("utf-8")
+        # 在多字节字符和标签中间切分
+        chunks = [data[:60], data[60:100], data[100:]]
+        
+        messages = list(self.client.parse_xml_stream(chunks))
+        
+        assert [m["MsgType"] for m in messages] == ["text", "event"]
+        assert messages[0]["Content"] == "你好"
+        assert messages[1]["Event"] == "enter_chat"
+        assert messages[0] == self.client.parse_xml(data.split(b"\n")[0])
+    
+    def test_parse_xml_stream_invalid(self):
+        """测试 XML 流格式错误"""
+        with pytest.raises(ValueError, match="Invalid XML"):
+            list(self.client.parse_xml_stream([b"<xml><Content></xml>"]))
+    
     # ============== XML 构建测试 ==============
     
     def test_build_text_xml(self):
@@ -181,6 +217,48 @@ class TestWeComIntelligentClient:
         assert "<CardType><![CDATA[text_notice]]></CardType>" in xml
         assert "<Feedback>" in xml
     
+    def test_build_stream_xml_bytes_matches_str(self):
+        """测试字节版流式消息与字符串版一致"""
+        from unittest.mock import patch
+        
+        with patch("time.time", return_value=1234567890):
+            expected = self.client.build_stream_xml(
+                to_user="user123",
+                from_user="ww123",
+                stream_id="stream_001",
+                content="中文内容",
+                finish=True,
+                feedback_id="fb_stream_001"
+            )
+            xml_bytes = self.client.build_stream_xml_bytes(
+                to_user="user123",
+                from_user="ww123",
+                stream_id="stream_001",
+                content="中文内容",
+                finish=True,
+                feedback_id="fb_stream_001"
+            )
+        
+        assert xml_bytes == expected.encode("utf-8")
+    
+    def test_build_stream_xml_bytes_accepts_encoded_content(self):
+        """测试字节版流式消息接受已编码的 bytes / bytearray 内容"""
+        from unittest.mock import patch
+        
+        content = "中文]]>内容"
+        with patch("time.time", return_value=1234567890):
+            expected = self.client.build_stream_xml_bytes("user123", "ww123", "stream_001", content, False)
+            from_bytes = self.client.build_stream_xml_bytes(
+                "user123", "ww123", "stream_001", content.encode("utf-8"), False
+            )
+            from_bytearray = self.client.build_stream_xml_bytes(
+                "user123", "ww123", "stream_001", bytearray(content.encode("utf-8")), False
+            )
+        
+        assert from_bytes == expected
+        assert from_bytearray == expected
+        assert isinstance(from_bytearray, bytes)
+    
     # ============== 辅助方法测试 ==============
     
     def test_generate_stream_id(self):
@@ -244,3 +322,28 @@ class TestWeComIntelligentClient:
         # CDATA 应该正确处理特殊字符
         assert content_with_special in xml
         assert "<Content><![CDATA[" in xml
+    
+    def test_build_xml_escapes_cdata_terminator(self):
+        """测试内容中的 ]]> 被拆分，生成的 XML 仍可解析出原文"""
+        import xml.etree.ElementTree as ET
+        
+        content = "a]]>b]]>"
+        text_xml = self.client.build_text_xml("user123", "ww123", content)
+        stream_xml = self.client.build_stream_xml(
+            to_user="user123",
+            from_user="ww123",
+            stream_id="stream_001",
+            content=content,
+            finish=True
+        )
+        stream_bytes = self.client.build_stream_xml_bytes(
+            to_user="user123",
+            from_user="ww123",
+            stream_id="stream_001",
+            content=content,
+            finish=True
+        )
+        
+        assert ET.fromstring(text_xml).findtext("Content") == content
+        assert ET.fromstring(stream_xml).findtext("Stream/Content") == content
+        assert ET.fromstring(stream_bytes).findtext("Stream/Content") == content
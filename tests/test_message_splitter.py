@@ -7,6 +7,8 @@ from forward_service.message_splitter import (
     get_string_bytes,
     split_message_content,
     split_and_format_message,
+    split_and_format_message_bytes,
+    split_and_format_message_contents,
     create_message_header,
     needs_split,
     MAX_MESSAGE_BYTES,
@@ -91,6 +93,25 @@ class TestSplitMessageContent:
         # 验证每段不超过限制
         for part in result:
             assert get_string_bytes(part) <= 50
+    
+    def test_long_line_cuts_on_char_boundary(self):
+        """超长行在字符边界处切分，不截断多字节字符"""
+        message = "a测😀" * 10  # 每组 1 + 3 + 4 = 8 字节
+        result = split_message_content(message, max_bytes=10)
+        assert "".join(result) == message
+        assert result[:2] == ["a测😀a", "测😀a"]
+        for part in result:
+            assert get_string_bytes(part) <= 10
+    
+    def test_parts_are_original_slices(self):
+        """按行累积的段与原文逐字一致（含空行和末尾换行）"""
+        message = "第一行\n\nline three\n" + "y" * 30 + "\ntail\n"
+        result = split_message_content(message, max_bytes=21)
+        assert result == ["第一行\n\nline three", "y" * 21, "y" * 9 + "\ntail\n"]
+    
+    def test_long_line_char_wider_than_limit(self):
+        """单个字符超过限制时单独成段"""
+        assert split_message_content("😀😀", max_bytes=3) == ["😀", "😀"]
 
 
 class TestCreateMessageHeader:
@@ -174,6 +195,57 @@ class TestSplitAndFormatMessage:
         assert len(result) > 1
         for split_msg in result:
             assert "[#abc12345]" in split_msg.content
+    
+    def test_reserve_matches_actual_header(self):
+        """按实际头部长度预留：每条不超过上限，且比固定预留 150 字节分出的条数少"""
+        message = "x" * 1900 * 10
+        result = split_and_format_message(message, short_id="abc12345")
+        
+        assert len(result) < len(split_message_content(message, EFFECTIVE_MAX_BYTES))
+        for split_msg in result:
+            assert get_string_bytes(split_msg.content) <= MAX_MESSAGE_BYTES
+        assert "".join(m.content.split("\n", 1)[1] for m in result) == message
+    
+    def test_reserve_grows_with_part_count(self):
+        """总段数超过 9 段时，分页信息变长，仍不超过上限"""
+        message = "测" * 700 * 12
+        result = split_and_format_message(message, short_id="abc12345", project_name="项目")
+        
+        assert len(result) > 9
+        assert result[-1].content.startswith(f"[#abc12345 项目] ({len(result)}/{len(result)})\n")
+        for split_msg in result:
+            assert get_string_bytes(split_msg.content) <= MAX_MESSAGE_BYTES
+    
+    @pytest.mark.parametrize("message", ["Hello", "测试内容\n" * 600, "x" * 5000])
+    def test_bytes_variant_matches(self, message):
+        """已编码消息的分拆结果与 str 版本一致"""
+        expected = split_and_format_message(message, short_id="abc12345", project_name="项目")
+        assert split_and_format_message_bytes(
+            message.encode("utf-8"), short_id="abc12345", project_name="项目"
+        ) == expected
+    
+    @pytest.mark.parametrize("short_id", ["", "abc12345"])
+    @pytest.mark.parametrize("message", ["Hello", "测试内容\n" * 600])
+    def test_contents_variant_matches(self, message, short_id):
+        """只返回内容的版本与 SplitMessage.content 一致"""
+        expected = [m.content for m in split_and_format_message(message, short_id, "项目")]
+        assert split_and_format_message_contents(message, short_id, "项目") == expected
+    
+    def test_split_message_is_slotted(self):
+        """SplitMessage 使用 __slots__，没有实例 __dict__"""
+        result = split_and_format_message("Hello", short_id="abc12345")
+        assert not hasattr(result[0], "__dict__")
+    
+    def test_split_without_short_id(self):
+        """没有 short_id 时不添加头部（即使有项目名）"""
+        result = split_and_format_message(
+            message="A" * 3000,
+            short_id="",
+            project_name="项目"
+        )
+        
+        assert len(result) > 1
+        assert "".join(m.content for m in result) == "A" * 3000
 
 
 class TestNeedsSplit:
@@ -215,3 +287,12 @@ class TestNeedsSplit:
         message = "x" * message_bytes
         
         assert needs_split(message, "abc12345", "项目") is True
+    
+    def test_exact_limit(self):
+        """边界情况：恰好等于限制不分拆，多 1 字节则分拆"""
+        header_bytes = get_string_bytes("[#abc12345 项目]\n")
+        message = "x" * (MAX_MESSAGE_BYTES - header_bytes)
+        assert needs_split(message, "abc12345", "项目") is False
+        assert needs_split(message + "x", "abc12345", "项目") is True
+        # 没有 short_id 时不计算头部
+        assert needs_split("x" * MAX_MESSAGE_BYTES, "", "项目") is False
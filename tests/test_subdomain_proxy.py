@@ -0,0 +1,222 @@
+"""
+子域名隧道转发测试
+
+测试 app.py 中基于 Host 头的子域名转发逻辑：
+- 子域名提取
+- 隧道未连接 / 转发成功 / 转发失败时的响应
+- 子域名请求优先于应用路由、非子域名请求的 404 兜底
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import orjson
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from forward_service import app as app_module
+
+
+@pytest.fixture
+def mock_tunnel_server():
+    """替换 app 模块中的 tunnel_server"""
+    server = MagicMock()
+    server.manager.is_connected.return_value = True
+    server.forward = AsyncMock()
+    with patch.object(app_module, "tunnel_server", server):
+        yield server
+
+
+def _client(host: str) -> AsyncClient:
+    transport = ASGITransport(app=app_module.app)
+    return AsyncClient(transport=transport, base_url=f"http://{host}")
+
+
+# ============== _extract_subdomain ==============
+
+def test_extract_subdomain():
+    base = app_module.TUNNEL_BASE_DOMAIN.encode()
+    assert app_module._extract_subdomain(b"my-agent." + base) == "my-agent"
+    assert app_module._extract_subdomain(b"my-agent." + base + b":8080") == "my-agent"
+    assert app_module._extract_subdomain(base) is None
+    assert app_module._extract_subdomain(b"." + base) is None
+    assert app_module._extract_subdomain(b"a.b." + base) is None
+    assert app_module._extract_subdomain(b"example.com") is None
+
+
+# ============== 转发行为 ==============
+
+@pytest.mark.asyncio
+async def test_forward_tunnel_not_connected(mock_tunnel_server):
+    mock_tunnel_server.manager.is_connected.return_value = False
+    async with _client(f"agent.{app_module.TUNNEL_BASE_DOMAIN}") as client:
+        resp = await client.get("/api/health")
+    assert resp.status_code == 503
+    assert resp.json() == {"error": "Tunnel not connected: agent"}
+
+
+@pytest.mark.asyncio
+async def test_forward_json_body_and_filter_response_headers(mock_tunnel_server):
+    mock_tunnel_server.forward.return_value = MagicMock(
+        status=201,
+        error=None,
+        body={"ok": True},
+        headers={
+            "content-type": "application/json",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "x-custom": "1",
+        },
+    )
+    async with _client(f"agent.{app_module.TUNNEL_BASE_DOMAIN}") as client:
+        resp = await client.post(
+            "/api/chat?a=1&b=2",
+            json={"message": "hi"},
+            headers={"X-Forwarded-For": "1.2.3.4", "X-Trace": "t1"},
+        )
+
+    assert resp.status_code == 201
+    assert orjson.loads(resp.content) == {"ok": True}
+    assert resp.headers["x-custom"] == "1"
+    assert "access-control-allow-origin" not in resp.headers
+
+    kwargs = mock_tunnel_server.forward.call_args.kwargs
+    assert kwargs["domain"] == "agent"
+    assert kwargs["method"] == "POST"
+    assert kwargs["path"] == "/api/chat?a=1&b=2"
+    assert orjson.loads(kwargs["body"]) == {"message": "hi"}
+    assert "host" not in kwargs["headers"]
+    assert "content-length" not in kwargs["headers"]
+    assert "x-forwarded-for" not in kwargs["headers"]
+    assert kwargs["headers"]["x-trace"] == "t1"
+
+
+@pytest.mark.asyncio
+async def test_forward_non_json_body(mock_tunnel_server):
+    mock_tunnel_server.forward.return_value = MagicMock(
+        status=200, error=None, body="pong", headers={"content-type": "text/plain"},
+    )
+    async with _client(f"agent.{app_module.TUNNEL_BASE_DOMAIN}") as client:
+        resp = await client.post("/echo", content=b"plain text")
+
+    assert resp.status_code == 200
+    assert resp.text == "pong"
+    assert mock_tunnel_server.forward.call_args.kwargs["body"] == "plain text"
+
+
+@pytest.mark.asyncio
+async def test_forward_error_response(mock_tunnel_server):
+    mock_tunnel_server.forward.side_effect = RuntimeError("boom")
+    async with _client(f"agent.{app_module.TUNNEL_BASE_DOMAIN}") as client:
+        resp = await client.get("/x")
+    assert resp.status_code == 502
+    assert resp.json() == {"error": "Forward failed: boom"}
+
+
+@pytest.mark.asyncio
+async def test_subdomain_takes_precedence_over_app_routes(mock_tunnel_server):
+    """子域名请求在路由匹配前被转发，不会落到 /health 等应用路由"""
+    mock_tunnel_server.forward.return_value = MagicMock(
+        status=200, error=None, body="upstream", headers={"content-type": "text/plain"},
+    )
+    async with _client(f"agent.{app_module.TUNNEL_BASE_DOMAIN}") as client:
+        resp = await client.get("/health")
+    assert resp.text == "upstream"
+    assert mock_tunnel_server.forward.call_args.kwargs["path"] == "/health"
+
+
+@pytest.mark.asyncio
+async def test_forward_keeps_raw_query_string(mock_tunnel_server):
+    mock_tunnel_server.forward.return_value = MagicMock(
+        status=200, error=None, body=b"", headers={},
+    )
+    async with _client(f"agent.{app_module.TUNNEL_BASE_DOMAIN}") as client:
+        await client.get("/search?q=a%20b&tag=x&tag=y")
+    assert mock_tunnel_server.forward.call_args.kwargs["path"] == "/search?q=a%20b&tag=x&tag=y"
+
+
+@pytest.mark.asyncio
+async def test_non_subdomain_unknown_path_returns_404(mock_tunnel_server):
+    async with _client("example.com") as client:
+        resp = await client.get("/no-such-route")
+    assert resp.status_code == 404
+    assert resp.json() == {"detail": "Not Found"}
+    mock_tunnel_server.forward.assert_not_called()
+
+
+# ============== SSE 帧合并 ==============
+
+async def _frames(*items, delay: float = 0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+@pytest.mark.asyncio
+async def test_coalesce_sse_frames_merges_burst():
+    out = [f async for f in app_module._coalesce_sse_frames(_frames(b"a", b"b", b"c"))]
+    assert b"".join(out) == b"abc"
+    assert len(out) == 1
+
+
+@pytest.mark.asyncio
+async def test_coalesce_sse_frames_flushes_on_size():
+    out = [
+        f async for f in app_module._coalesce_sse_frames(
+            _frames(b"xx", b"yy", b"zz"), max_bytes=4,
+        )
+    ]
+    assert out == [b"xxyy", b"zz"]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_sse_frames_flushes_on_delay():
+    out = [
+        f async for f in app_module._coalesce_sse_frames(
+            _frames(b"a", b"b", delay=0.05), max_delay=0.001,
+        )
+    ]
+    assert out == [b"a", b"b"]
+
+
+# ============== SSE 转发 ==============
+
+class _Start:
+    pass
+
+
+class _Chunk:
+    def __init__(self, data):
+        self.data = data
+
+
+class _End:
+    def __init__(self, error=None):
+        self.error = error
+
+
+@pytest.mark.asyncio
+async def test_forward_sse_stream(mock_tunnel_server):
+    async def fake_stream(**kwargs):
+        yield _Start()
+        yield _Chunk("hello")
+        yield _Chunk("世界")
+        yield _End()
+
+    mock_tunnel_server.forward_stream = fake_stream
+    with (
+        patch.object(app_module, "StreamStartMessage", _Start),
+        patch.object(app_module, "StreamChunkMessage", _Chunk),
+        patch.object(app_module, "StreamEndMessage", _End),
+    ):
+        async with _client(f"agent.{app_module.TUNNEL_BASE_DOMAIN}") as client:
+            resp = await client.get("/events", headers={"Accept": "text/event-stream"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text == (
+        "event: start\ndata: {}\n\n"
+        "data: hello\n\n"
+        "data: 世界\n\n"
+        "event: done\ndata: {}\n\n"
+    )
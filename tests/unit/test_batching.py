@@ -0,0 +1,73 @@
+"""
+出站消息合并发送单元测试
+
+测试覆盖：
+- 窗口期内同一目标的消息合并为一次发送
+- 不同目标分别发送
+- max_chars 限制下拆分
+- 发送失败不影响后续消息
+"""
+import asyncio
+
+import pytest
+
+from forward_service.utils.batching import MessageBatcher
+
+
+class _Recorder:
+    def __init__(self, fail_targets=()):
+        self.calls = []
+        self.fail_targets = set(fail_targets)
+
+    async def __call__(self, target, text):
+        if target in self.fail_targets:
+            raise RuntimeError("send failed")
+        self.calls.append((target, text))
+
+
+class TestMessageBatcher:
+    @pytest.mark.asyncio
+    async def test_merges_same_target_within_window(self):
+        send = _Recorder()
+        batcher = MessageBatcher(send, window=0.05, separator="|")
+        for text in ("a", "b", "c"):
+            await batcher.enqueue("chat1", text)
+        await asyncio.sleep(0.1)
+        await batcher.close()
+
+        assert send.calls == [("chat1", "a|b|c")]
+
+    @pytest.mark.asyncio
+    async def test_groups_by_target(self):
+        send = _Recorder()
+        batcher = MessageBatcher(send, window=0.05, separator="|")
+        await batcher.enqueue("chat1", "a")
+        await batcher.enqueue("chat2", "x")
+        await batcher.enqueue("chat1", "b")
+        await asyncio.sleep(0.1)
+        await batcher.close()
+
+        assert sorted(send.calls) == [("chat1", "a|b"), ("chat2", "x")]
+
+    @pytest.mark.asyncio
+    async def test_splits_when_exceeding_max_chars(self):
+        send = _Recorder()
+        batcher = MessageBatcher(send, window=0.05, separator="|", max_chars=5)
+        for text in ("aa", "bb", "cc"):
+            await batcher.enqueue("chat1", text)
+        await asyncio.sleep(0.1)
+        await batcher.close()
+
+        assert send.calls == [("chat1", "aa|bb"), ("chat1", "cc")]
+
+    @pytest.mark.asyncio
+    async def test_failure_does_not_stop_sender(self):
+        send = _Recorder(fail_targets={"bad"})
+        batcher = MessageBatcher(send, window=0.01)
+        await batcher.enqueue("bad", "x")
+        await asyncio.sleep(0.05)
+        await batcher.enqueue("good", "y")
+        await asyncio.sleep(0.05)
+        await batcher.close()
+
+        assert send.calls == [("good", "y")]
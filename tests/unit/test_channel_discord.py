@@ -6,6 +6,7 @@ DiscordAdapter 单元测试
 - send_outbound: 成功 + 分拆 + 失败（mocked DiscordBotClient）
 - should_ignore: Bot 消息
 - extract_bot_key: 从 kwargs / raw_data
+- DiscordBotClient.send_dm: DM 频道缓存
 """
 import sys
 from pathlib import Path
@@ -220,3 +221,26 @@ async def test_send_outbound_send_dm_returns_none(adapter):
 
 def test_platform_name(adapter):
     assert adapter.platform == "discord"
+
+
+# ============== DiscordBotClient.send_dm 测试 ==============
+
+@pytest.mark.asyncio
+async def test_send_dm_caches_dm_channel():
+    from forward_service.clients.discord import DiscordBotClient
+
+    client = DiscordBotClient(bot_token="t", on_message_callback=AsyncMock(), bot_key="k")
+    channel = MagicMock()
+    channel.send = AsyncMock(return_value="msg")
+    user = MagicMock(dm_channel=None)
+    user.create_dm = AsyncMock(return_value=channel)
+
+    with patch.object(client, "get_user", return_value=None), \
+            patch.object(client, "fetch_user", AsyncMock(return_value=user)) as fetch_user:
+        assert await client.send_dm(42, "a") == "msg"
+        assert await client.send_dm(42, "b") == "msg"
+
+    fetch_user.assert_awaited_once_with(42)
+    user.create_dm.assert_awaited_once()
+    assert channel.send.await_count == 2
+    await client.close()
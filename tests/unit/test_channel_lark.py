@@ -6,6 +6,11 @@ LarkAdapter 单元测试
 - send_outbound: 成功 + 失败（mocked LarkClient）
 - get_verification_response: url_verification payload
 - should_ignore: sender_type == "bot"（app）/ URL 验证
+- get_lark_client: 按 app_id 复用客户端
+- get_tenant_access_token: 并发刷新只请求一次
+- decrypt_event: 飞书加密方案解密
+- format_agent_response: 预序列化卡片模板
+- parse_event: JSON / 纯文本消息内容
 """
 import json
 import sys
@@ -231,6 +236,110 @@ async def test_send_outbound_api_error(adapter):
     assert "Token expired" in result.error
 
 
+# ============== 客户端复用测试 ==============
+
+@pytest.mark.asyncio
+async def test_get_lark_client_reuses_instance_per_app_id():
+    from forward_service.clients import lark as lark_module
+
+    with patch.dict(lark_module._clients, clear=True):
+        first = lark_module.get_lark_client("cli_reuse", "secret")
+        assert lark_module.get_lark_client("cli_reuse", "secret") is first
+
+        # 凭证变化时重建
+        rotated = lark_module.get_lark_client("cli_reuse", "new-secret")
+        assert rotated is not first
+
+        http = rotated._get_http()
+        assert rotated._get_http() is http
+        await lark_module.close_lark_clients()
+        assert http.is_closed
+        assert lark_module._clients == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_token_fetch_issues_single_request():
+    import asyncio
+    from forward_service.clients.lark import LarkClient
+
+    client = LarkClient("cli_lock", "secret")
+    response = MagicMock()
+    response.json.return_value = {"code": 0, "tenant_access_token": "t-1", "expire": 7200}
+
+    async def slow_post(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return response
+
+    http = MagicMock()
+    http.post = AsyncMock(side_effect=slow_post)
+    with patch.object(client, "_get_http", return_value=http):
+        tokens = await asyncio.gather(*(client.get_tenant_access_token() for _ in range(5)))
+
+    assert tokens == ["t-1"] * 5
+    assert http.post.await_count == 1
+    assert client._auth_headers["Authorization"] == "Bearer t-1"
+    assert client._token_refresh_task is not None
+    await client.close()
+    assert client._token_refresh_task is None
+
+
+def test_decrypt_event_roundtrip():
+    """按飞书方案加密：key = SHA-256(encrypt_key)，IV 拼在密文前"""
+    import base64
+    import hashlib
+    import os
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.primitives.padding import PKCS7
+    from forward_service.clients.lark import LarkClient
+
+    payload = json.dumps({"header": {"event_id": "e1"}, "text": "你好"}).encode()
+    key = hashlib.sha256(b"test-encrypt-key").digest()
+    iv = os.urandom(16)
+    padder = PKCS7(128).padder()
+    padded = padder.update(payload) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    encrypted = base64.b64encode(iv + encryptor.update(padded) + encryptor.finalize()).decode()
+
+    client = LarkClient("cli_enc", "secret", encrypt_key="test-encrypt-key")
+    assert client.decrypt_event(encrypted) == {"header": {"event_id": "e1"}, "text": "你好"}
+
+
+def test_decrypt_event_without_key_raises():
+    from forward_service.clients.lark import LarkClient
+
+    with pytest.raises(ValueError):
+        LarkClient("cli_enc", "secret").decrypt_event("xxx")
+
+
+def test_format_agent_response_card_matches_build_text_card():
+    from forward_service.clients.lark import LarkClient
+
+    client = LarkClient("cli_card", "secret")
+    reply = '含"引号"和\n换行的长回复' * 300
+    msg_type, content = client.format_agent_response(reply)
+
+    assert msg_type == "interactive"
+    assert json.loads(content) == client.build_text_card(
+        title="Agent 回复", content=reply[:4000], note="由 AI Agent 生成"
+    )
+    assert client.format_agent_response("short") == ("text", {"text": "short"})
+
+
+def test_parse_event_message_content():
+    from forward_service.clients.lark import LarkClient
+
+    client = LarkClient("cli_parse", "secret")
+
+    def event(content):
+        return {"header": {"event_id": "e1", "create_time": "1700000000000"},
+                "event": {"message": {"chat_id": "oc_1", "content": content}}}
+
+    assert client.parse_event(event('{"text": "hello"}')).text == "hello"
+    assert client.parse_event(event("plain text")).text == "plain text"
+    assert client.parse_event(event("{broken")).text == "{broken"
+    assert client.parse_event(event(None)).timestamp == 1700000000
+
+
 # ============== platform 属性测试 ==============
 
 def test_platform_name(adapter):
@@ -7,6 +7,7 @@ SlackAdapter 单元测试
 - should_ignore: 重试请求头 / Bot 消息
 - get_verification_response: url_verification payload
 - extract_bot_key: 从 api_app_id
+- SlackClient.download_file: 流式下载到 bytes / 文件对象
 """
 import sys
 from pathlib import Path
@@ -237,6 +238,31 @@ async def test_send_outbound_api_error(adapter):
     assert "channel_not_found" in result.error
 
 
+# ============== SlackClient.download_file 测试 ==============
+
+@pytest.mark.asyncio
+async def test_download_file_streams_to_bytes_and_dest():
+    import io
+    import httpx
+    from forward_service.clients.slack import SlackClient
+
+    payload = b"x" * (200 * 1024)
+
+    def handler(request):
+        assert request.headers["Authorization"] == "Bearer xoxb-test"
+        return httpx.Response(200, content=payload)
+
+    client = SlackClient("xoxb-test")
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    assert await client.download_file("https://files.slack.com/f") == payload
+
+    dest = io.BytesIO()
+    assert await client.download_file("https://files.slack.com/f", dest=dest) is None
+    assert dest.getvalue() == payload
+    await client.close()
+
+
 # ============== platform 属性测试 ==============
 
 def test_platform_name(adapter):
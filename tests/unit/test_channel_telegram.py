@@ -6,6 +6,7 @@ TelegramAdapter 单元测试
 - send_outbound: 成功 + 失败（mocked TelegramClient）
 - should_ignore: Bot 作者消息
 - extract_bot_key: 从请求头提取
+- TelegramClient.send_messages_bulk: 并发发送，结果按顺序返回
 """
 import sys
 from pathlib import Path
@@ -223,6 +224,74 @@ async def test_send_outbound_long_message_splits(adapter):
     assert mock_client.send_message.call_count >= 2
 
 
+# ============== TelegramClient 批量发送测试 ==============
+
+@pytest.mark.asyncio
+async def test_send_messages_bulk_returns_results_in_order():
+    from forward_service.clients.telegram import TelegramClient
+
+    client = TelegramClient("123:ABC")
+
+    async def fake_send(chat_id, text, **kwargs):
+        if chat_id == "bad":
+            raise RuntimeError("blocked")
+        return {"ok": True, "chat_id": chat_id}
+
+    with patch.object(client, "send_message", side_effect=fake_send):
+        results = await client.send_messages_bulk([
+            {"chat_id": "1", "text": "a"},
+            {"chat_id": "bad", "text": "b"},
+            {"chat_id": "3", "text": "c"},
+        ])
+
+    assert results[0] == {"ok": True, "chat_id": "1"}
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == {"ok": True, "chat_id": "3"}
+
+
+def test_escape_markdown_escapes_all_special_chars():
+    from forward_service.clients.telegram import TelegramClient
+
+    assert TelegramClient.escape_markdown("a_b*[x](y)~`>#+-=|{}.!") == (
+        "a\\_b\\*\\[x\\]\\(y\\)\\~\\`\\>\\#\\+\\-\\=\\|\\{\\}\\.\\!"
+    )
+    assert TelegramClient.escape_markdown("plain 中文") == "plain 中文"
+
+
+def test_parse_update_returns_slotted_result():
+    from forward_service.clients.telegram import TelegramClient
+
+    update = {
+        "update_id": 7,
+        "message": {
+            "message_id": 11,
+            "date": 1700000000,
+            "chat": {"id": -100, "type": "group"},
+            "from": {"id": 42, "username": "alice"},
+            "text": "hi",
+        },
+    }
+    parsed = TelegramClient("123:ABC").parse_update(update)
+
+    assert (parsed.chat_id, parsed.user_id, parsed.text, parsed.message_id) == (-100, 42, "hi", 11)
+    assert parsed.reply_to_message_id is None
+    assert not hasattr(parsed, "__dict__")
+
+    empty = TelegramClient("123:ABC").parse_update({"update_id": 8})
+    assert empty.update_id == 8 and empty.text is None
+
+
+def test_verify_webhook():
+    from forward_service.clients.telegram import TelegramClient
+
+    assert TelegramClient("123:ABC").verify_webhook(None) is True
+
+    client = TelegramClient("123:ABC", secret_token="s3cret")
+    assert client.verify_webhook("s3cret") is True
+    assert client.verify_webhook("wrong") is False
+    assert client.verify_webhook(None) is False
+
+
 # ============== platform 属性测试 ==============
 
 def test_platform_name(adapter):
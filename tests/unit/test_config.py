@@ -0,0 +1,104 @@
+"""
+配置数据类单元测试
+
+测试覆盖：
+- AccessControl.check_access 各模式下 user_id / chat_id / alias 的匹配
+- ConfigDB.extract_bot_key_from_webhook_url
+- BotConfig.to_dict 结果缓存
+- BotConfig.from_bot 不保留数据库模型
+- 配置类使用 __slots__
+"""
+import pytest
+
+from forward_service.config import AccessControl, BotConfig, ConfigDB, ForwardConfig
+
+
+class TestAccessControl:
+    def test_allow_all(self):
+        ac = AccessControl()
+        assert ac.check_access("anyone") == (True, "")
+
+    def test_whitelist_matches_any_identity(self):
+        ac = AccessControl(mode="whitelist", whitelist=["u1", "group1", "alice"])
+        assert ac.check_access("u1")[0] is True
+        assert ac.check_access("u2", chat_id="group1")[0] is True
+        assert ac.check_access("u2", alias="alice")[0] is True
+
+        allowed, reason = ac.check_access("u2", chat_id="group2", alias="bob")
+        assert allowed is False
+        assert "没有权限" in reason
+
+    def test_blacklist_matches_any_identity(self):
+        ac = AccessControl(mode="blacklist", blacklist=["u1", "group1", "alice"])
+        assert ac.check_access("u1")[0] is False
+        assert ac.check_access("u2", chat_id="group1")[0] is False
+        assert ac.check_access("u2", alias="alice")[0] is False
+        assert ac.check_access("u2", chat_id="group2", alias="bob") == (True, "")
+
+    def test_results_are_shared(self):
+        wl = AccessControl(mode="whitelist", whitelist=["u1"])
+        assert wl.check_access("u1") is AccessControl().check_access("u2")
+        assert wl.check_access("u2") is AccessControl(mode="blacklist", blacklist=["u2"]).check_access("u2")
+
+    def test_unknown_mode(self):
+        assert AccessControl(mode="bogus").check_access("u1") == (False, "未知的访问控制模式")
+
+    def test_to_dict_keeps_lists(self):
+        ac = AccessControl(mode="whitelist", whitelist=["b", "a"])
+        assert ac.to_dict() == {"mode": "whitelist", "whitelist": ["b", "a"], "blacklist": []}
+
+
+class TestExtractBotKey:
+    def test_extract_bot_key_from_webhook_url(self):
+        config = ConfigDB()
+        base = "https://qyapi.weixin.qq.com/cgi-bin/webhook/send"
+        assert config.extract_bot_key_from_webhook_url(f"{base}?key=abc-123") == "abc-123"
+        assert config.extract_bot_key_from_webhook_url(f"{base}?debug=1&key=abc&x=2") == "abc"
+        assert config.extract_bot_key_from_webhook_url(f"{base}?apikey=abc") is None
+        assert config.extract_bot_key_from_webhook_url(base) is None
+
+
+class TestForwardConfig:
+    @pytest.mark.parametrize("target_url, url_template, expected", [
+        ("https://t.example.com", "https://old/{agent_id}", "https://t.example.com"),
+        ("", "https://old/{agent_id}", "https://old/a1"),
+        (None, None, ""),
+    ])
+    def test_from_bot_url(self, target_url, url_template, expected):
+        from forward_service.models import Chatbot
+
+        model = Chatbot(bot_key="k", target_url=target_url, url_template=url_template, agent_id="a1", timeout=60)
+        assert ForwardConfig.from_bot(model).target_url == expected
+
+
+class TestBotConfig:
+    def test_to_dict_is_cached(self):
+        bot = BotConfig(bot_key="k", name="Bot", access_control=AccessControl(mode="whitelist", whitelist=["u1"]))
+        d = bot.to_dict()
+        assert d["access_control"] == {"mode": "whitelist", "whitelist": ["u1"], "blacklist": []}
+        assert bot.to_dict() is d
+
+    def test_from_bot_copies_platform_config(self):
+        from forward_service.models import Chatbot
+
+        model = Chatbot(
+            bot_key="k", name="Bot", target_url="http://x", platform="telegram",
+            platform_config='{"bot_token": "t"}', access_mode="allow_all", enabled=True,
+            timeout=60, sync_timeout_seconds=30, max_task_duration_seconds=1800,
+        )
+        model.access_rules = []
+        bot = BotConfig.from_bot(model)
+
+        assert bot.platform == "telegram"
+        assert bot.get_platform_config() == {"bot_token": "t"}
+        assert not hasattr(bot, "_bot")
+
+    @pytest.mark.parametrize("obj", [
+        ForwardConfig(target_url=""),
+        AccessControl(),
+        BotConfig(bot_key="k"),
+    ])
+    def test_slotted(self, obj):
+        assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            obj.unexpected = 1